@@ -12,6 +12,12 @@ def mock_media(settings):
         yield temp_directory
 
 
+@pytest.fixture(autouse=True)
+def temp_media_root(settings, tmp_path):
+    """Картинки mixer и миниатюры не попадают в yatube/media."""
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
 @pytest.fixture
 def mixer():
     return _mixer
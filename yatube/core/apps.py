@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .cache import clear_caches
+        from .sqlite import configure_connection
+        connection_created.connect(configure_connection)
+        post_migrate.connect(clear_caches, dispatch_uid='core_clear_caches')
@@ -0,0 +1,297 @@
+import math
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+# Локальные уровни общие для всех потоков процесса, как у LocMemCache.
+_local_tiers = {}
+_stats = {}
+_miss_started = {}
+_locks = {}
+
+
+def key_prefix(key):
+    """Группа ключа для статистики: `user:1` -> `user`,
+    `template.cache.index_page.<hash>` -> `template.cache.index_page`."""
+    if ':' in key:
+        return key.split(':', 1)[0]
+    if '.' in key:
+        return key.rsplit('.', 1)[0]
+    return key
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кеш: ограниченный LRU в памяти процесса
+    перед общим для всех процессов кешем (settings.CACHES[SHARED_ALIAS]).
+
+    При истечении записи пересчитывает её только один процесс: он получает
+    блокировку и промах, остальные получают устаревшее значение.
+    Вычисляющий значение обязан вызвать set() или release() (удобнее
+    через get_or_set). Незадолго до истечения запись с некоторой
+    вероятностью пересчитывается заранее (XFetch), чтобы промахи
+    не совпадали по времени. Промах по отсутствующему ключу блокировку
+    не берёт: ждать нечего, значение считает каждый.
+    Удаление сбрасывает локальный уровень только в текущем процессе,
+    поэтому в остальных запись живёт не дольше LOCAL_TIMEOUT секунд.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.stale_grace = options.get('STALE_GRACE', 60)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        self.beta = options.get('EARLY_REFRESH_BETA', 1.0)
+        self._local = _local_tiers.setdefault(location, OrderedDict())
+        self._stats = _stats.setdefault(location, defaultdict(
+            lambda: {'hits': 0, 'misses': 0, 'stale': 0, 'early': 0}
+        ))
+        self._miss_started = _miss_started.setdefault(location, {})
+        self._lock = _locks.setdefault(location, threading.Lock())
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _count(self, key, event):
+        with self._lock:
+            self._stats[key_prefix(key)][event] += 1
+
+    def stats(self):
+        """Счётчики попаданий и промахов по группам ключей."""
+        with self._lock:
+            return {
+                prefix: dict(counters)
+                for prefix, counters in self._stats.items()
+            }
+
+    def _local_get(self, key):
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            envelope, local_expires = item
+            if local_expires <= time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return envelope
+
+    def _local_set(self, key, envelope):
+        local_expires = min(envelope[1], time.time() + self.local_timeout)
+        with self._lock:
+            self._local[key] = (envelope, local_expires)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    def _envelope(self, key, value, timeout):
+        """Значение, время истечения и время его вычисления."""
+        now = time.time()
+        with self._lock:
+            started = self._miss_started.pop(key, None)
+        delta = max(time.monotonic() - started, 0) if started else 0
+        expires = math.inf if timeout is None else now + timeout
+        return (value, expires, delta)
+
+    def _shared_timeout(self, timeout):
+        return None if timeout is None else timeout + self.stale_grace
+
+    def _acquire(self, key):
+        return self.shared.add(
+            'lock:' + key, 1, self.lock_timeout
+        )
+
+    def _release(self, key):
+        self.shared.delete('lock:' + key)
+
+    def _miss(self, key, raw_key, default):
+        """Промах: запоминает начало вычисления для XFetch. Записи
+        о ключах, которые так и не сохранили, вытесняются старейшими
+        первыми, словарь не больше LOCAL_MAX_ENTRIES."""
+        with self._lock:
+            self._miss_started.pop(key, None)
+            self._miss_started[key] = time.monotonic()
+            while len(self._miss_started) > self.local_max_entries:
+                del self._miss_started[next(iter(self._miss_started))]
+        self._count(raw_key, 'misses')
+        return default
+
+    def get(self, key, default=None, version=None):
+        raw_key = key
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        envelope = self._local_get(key)
+        if envelope is None:
+            envelope = self.shared.get(key)
+            if envelope is None:
+                return self._miss(key, raw_key, default)
+            self._local_set(key, envelope)
+        value, expires, delta = envelope
+        now = time.time()
+        early = delta * self.beta * -math.log(1 - random.random())
+        if now + early < expires:
+            self._count(raw_key, 'hits')
+            return value
+        if self._acquire(key):
+            if now < expires:
+                self._count(raw_key, 'early')
+            return self._miss(key, raw_key, default)
+        self._count(raw_key, 'hits' if now < expires else 'stale')
+        return value
+
+    def get_stale(self, key, default=None, version=None):
+        """Значение, даже истёкшее, без блокировки и пересчёта."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        envelope = self._local_get(key) or self.shared.get(key)
+        return default if envelope is None else envelope[0]
+
+    def release(self, key, version=None):
+        """Отказ от пересчёта после промаха: снимает блокировку."""
+        key = self.make_key(key, version=version)
+        with self._lock:
+            self._miss_started.pop(key, None)
+        self._release(key)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT,
+                   version=None):
+        missing = object()
+        value = self.get(key, missing, version=version)
+        if value is not missing:
+            return value
+        try:
+            value = default() if callable(default) else default
+        except BaseException:
+            self.release(key, version=version)
+            raise
+        self.set(key, value, timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self._delete(key)
+            return
+        envelope = self._envelope(key, value, timeout)
+        self.shared.set(key, envelope, self._shared_timeout(timeout))
+        self._local_set(key, envelope)
+        self._release(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._timeout(timeout)
+        envelope = self._envelope(key, value, timeout)
+        shared_timeout = self._shared_timeout(timeout)
+        if self.shared.add(key, envelope, shared_timeout):
+            self._local_set(key, envelope)
+            return True
+        # Истёкшая запись ещё лежит в общем кеше STALE_GRACE секунд,
+        # но для add её нет: заменяет её тот, кто первым взял add:<ключ>.
+        current = self.shared.get(key)
+        if current is not None and time.time() < current[1]:
+            return False
+        guard = 'add:' + key
+        if not self.shared.add(guard, 1, self.lock_timeout):
+            return False
+        try:
+            current = self.shared.get(key)
+            if current is not None and time.time() < current[1]:
+                return False
+            self.shared.set(key, envelope, shared_timeout)
+        finally:
+            self.shared.delete(guard)
+        self._local_set(key, envelope)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version=version)
+        envelope = self.shared.get(made_key)
+        if envelope is None:
+            return False
+        self.set(key, envelope[0], timeout, version)
+        return True
+
+    def _timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
+
+    def _delete(self, key):
+        self._local_delete(key)
+        with self._lock:
+            self._miss_started.pop(key, None)
+        self.shared.delete(key)
+        self._release(key)
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._delete(key)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        return (
+            self._local_get(key) is not None
+            or self.shared.has_key(key)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+            self._miss_started.clear()
+        self.shared.clear()
+
+
+def get_stale(cache, key):
+    """Последнее значение ключа, даже истёкшее; для кешей без
+    уровней — обычный get."""
+    method = getattr(cache, 'get_stale', None)
+    return method(key) if method else cache.get(key)
+
+
+def release(cache, key):
+    """Снимает блокировку пересчёта TieredCache, если значение
+    после промаха решили не сохранять."""
+    method = getattr(cache, 'release', None)
+    if method:
+        method(key)
+
+
+def clear_caches(sender, **kwargs):
+    """После миграций сбрасывает все кеши: сохранённые в них
+    экземпляры моделей могли устареть вместе со схемой."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def collect_metrics():
+    samples = []
+    for location, stats in list(_stats.items()):
+        for prefix, counters in list(stats.items()):
+            for event, value in counters.items():
+                samples.append((
+                    'cache_events_total',
+                    {'cache': location, 'prefix': prefix, 'event': event},
+                    value
+                ))
+    return samples
+
+
+metrics.register_collector(collect_metrics)
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+
+from django.conf import settings
+
+# Номер события — сквозное смещение конца записи от начала первого файла
+# журнала. При ротации текущий файл становится path.1, а смещение начала
+# нового файла хранится рядом в path.base, так что номера не повторяются.
+rotation_lock = threading.Lock()
+
+
+def append(topics, data, path=None):
+    """Дописывает событие в общий журнал изменений.
+
+    Строка пишется одним вызовом write в файл с O_APPEND,
+    поэтому записи разных процессов не перемешиваются.
+    """
+    line = json.dumps(
+        {'topics': list(topics), 'data': data}, ensure_ascii=False
+    ) + '\n'
+    fd = os.open(
+        path or settings.CHANGELOG_FILE,
+        os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+        0o644
+    )
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+
+
+def size(path=None):
+    try:
+        return os.path.getsize(path or settings.CHANGELOG_FILE)
+    except FileNotFoundError:
+        return 0
+
+
+def bases(path=None):
+    """Смещения начала текущего файла журнала и предыдущего (path.1)."""
+    try:
+        with open((path or settings.CHANGELOG_FILE) + '.base') as stored:
+            base, previous = json.load(stored)
+    except (FileNotFoundError, ValueError):
+        return 0, 0
+    return base, previous
+
+
+def end(path=None):
+    """Номер последней записи журнала с учётом ротаций."""
+    with rotation_lock:
+        return bases(path)[0] + size(path)
+
+
+def rotate(path=None):
+    """Переносит журнал в path.1, прежний path.1 удаляется.
+
+    Пишущие процессы открывают файл на каждую запись, поэтому
+    следующая запись уже создаст новый файл.
+    """
+    path = path or settings.CHANGELOG_FILE
+    with rotation_lock:
+        base, _ = bases(path)
+        try:
+            os.replace(path, path + '.1')
+        except FileNotFoundError:
+            return
+        stored = path + '.base.tmp'
+        with open(stored, 'w') as file:
+            json.dump([base + size(path + '.1'), base], file)
+        os.replace(stored, path + '.base')
+
+
+def read_file(path, base, offset):
+    try:
+        log = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    events = []
+    with log:
+        log.seek(offset)
+        for line in log:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            try:
+                events.append((base + offset, json.loads(line)))
+            except ValueError:
+                continue
+    return events
+
+
+def read(after, path=None):
+    """События после номера after: пары (номер, событие).
+    Недописанная последняя строка пропускается.
+
+    Номер из удалённого при ротации файла отдаёт всё, что осталось,
+    начиная с path.1.
+    """
+    path = path or settings.CHANGELOG_FILE
+    with rotation_lock:
+        base, previous = bases(path)
+        events = []
+        if after < base:
+            events = read_file(
+                path + '.1', previous, max(after - previous, 0)
+            )
+        return events + read_file(path, base, max(after - base, 0))
@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def sse(request):
+    """Добавляет адрес потока Server-Sent Events."""
+    return {
+        'sse_url': settings.SSE_URL,
+    }
@@ -0,0 +1,43 @@
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+
+def compress(text):
+    return zlib.compress(text.encode(), settings.TEXT_COMPRESS_LEVEL)
+
+
+def decompress(data):
+    return zlib.decompress(data).decode()
+
+
+class CompressedTextField(models.BinaryField):
+    """Строка, которая хранится в БД сжатой zlib.
+
+    В Python значение — обычный str (или None), сжатие и распаковка
+    происходят при записи и чтении. Поиск и сравнение в SQL
+    по такому полю невозможны.
+    """
+
+    description = 'Текст, сжатый zlib'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return decompress(bytes(value))
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        return decompress(bytes(value))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        return super().get_db_prep_value(
+            compress(value), connection, prepared
+        )
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
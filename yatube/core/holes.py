@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import re
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from . import routers
+from .cache import release
+from .versions import get_versions
+
+HOLE_RE = re.compile(r'<!--hole:([\w-]+):([^>]*)-->')
+
+fillers = {}
+
+
+def register_hole(name):
+    """Регистрирует функцию, которая отрисовывает персональный фрагмент
+    страницы: filler(request, *args) -> str."""
+    def decorator(filler):
+        fillers[name] = filler
+        return filler
+    return decorator
+
+
+def render_hole(request, name, args):
+    return mark_safe(fillers[name](request, *args))
+
+
+def hole_marker(name, args):
+    return '<!--hole:{}:{}-->'.format(
+        name, '|'.join(quote(str(arg), safe='') for arg in args)
+    )
+
+
+def fill_holes(content, request):
+    def replace(match):
+        args = match.group(2)
+        args = [unquote(arg) for arg in args.split('|')] if args else []
+        return render_hole(request, match.group(1), args)
+    return HOLE_RE.sub(replace, content)
+
+
+def page_key(request, models):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    versions = '.'.join(str(version) for version in get_versions(*models))
+    return f'page:{path}:{versions}'
+
+
+def cache_page_with_holes(*models):
+    """Кеширует страницу целиком, один раз для всех пользователей.
+
+    Персональные фрагменты, отмеченные в шаблоне тегом {% hole %},
+    в кеш попадают в виде меток и отрисовываются заново на каждый запрос.
+    Ключ включает версии таблиц models, поэтому изменения в них
+    сразу дают новую страницу. Клиенты, недавно что-то записавшие
+    (см. core.routers), получают страницу без кеша.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or routers.is_pinned()
+            ):
+                return view(request, *args, **kwargs)
+            key = page_key(request, models)
+            cached = cache.get(key)
+            if cached is not None:
+                shell, content_type = cached
+                return HttpResponse(
+                    fill_holes(shell, request), content_type=content_type
+                )
+            request.punch_holes = True
+            stored = False
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                shell = response.content.decode(response.charset)
+                cache.set(
+                    key, (shell, response['Content-Type']),
+                    settings.PAGE_CACHE_TIMEOUT
+                )
+                stored = True
+            finally:
+                if not stored:
+                    release(cache, key)
+            response.content = fill_holes(shell, request)
+            return response
+        return wrapper
+    return decorator
+
+
+@register_hole('header')
+def header(request):
+    return render_to_string(
+        'includes/header.html',
+        {'follow_poll_interval': settings.FOLLOW_POLL_INTERVAL},
+        request=request
+    )
+
+
+@register_hole('csrf_token')
+def csrf_token(request):
+    return format_html(
+        '<input type="hidden" name="csrfmiddlewaretoken" value="{}">',
+        get_token(request)
+    )
@@ -0,0 +1,170 @@
+import json
+import logging
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import OutgoingEmail, Task
+from .taskqueue import backoff, enqueue
+
+logger = logging.getLogger(__name__)
+
+FLUSH_TASK = 'core.send_email_batch'
+
+
+def schedule_flush(countdown=0):
+    """Одна ожидающая задача отправки на все письма в очереди;
+    если она запланирована позже нужного, её срок переносится."""
+    run_at = timezone.now() + timedelta(seconds=countdown)
+    flush_task = enqueue(
+        FLUSH_TASK, dedup_key=FLUSH_TASK, priority=1, countdown=countdown
+    )
+    if flush_task.run_at > run_at:
+        Task.objects.filter(pk=flush_task.pk).update(run_at=run_at)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Не отправляет письма, а сохраняет их в очередь в базе.
+
+    Доставку выполняет задача send_email_batch через транспорт
+    settings.EMAIL_TRANSPORT_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        rows = []
+        for message in email_messages:
+            if message.attachments:
+                raise ValueError('Вложения в очереди писем не поддержаны')
+            rows.append(OutgoingEmail(
+                subject=message.subject[:255],
+                body=message.body,
+                content_subtype=message.content_subtype,
+                from_email=message.from_email,
+                to=json.dumps(message.to),
+                cc=json.dumps(message.cc),
+                bcc=json.dumps(message.bcc),
+                reply_to=json.dumps(message.reply_to),
+                headers=json.dumps(message.extra_headers),
+                alternatives=json.dumps(
+                    getattr(message, 'alternatives', [])
+                ),
+                recipients=', '.join(message.recipients()),
+                next_attempt=now,
+            ))
+        if not rows:
+            return 0
+        OutgoingEmail.objects.bulk_create(rows)
+        schedule_flush()
+        metrics.inc('emails_queued_total', len(rows))
+        return len(rows)
+
+
+def build_message(email):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=json.loads(email.to),
+        cc=json.loads(email.cc),
+        bcc=json.loads(email.bcc),
+        reply_to=json.loads(email.reply_to),
+        headers=json.loads(email.headers),
+        alternatives=[tuple(item) for item in json.loads(email.alternatives)],
+    )
+    message.content_subtype = email.content_subtype
+    return message
+
+
+def fail(email, error):
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.DEAD
+        metrics.inc('emails_dead_total')
+        logger.error('Письмо %s не доставлено: %s', email.pk, error)
+    else:
+        email.status = OutgoingEmail.PENDING
+        email.next_attempt = timezone.now() + timedelta(
+            seconds=backoff(email.attempts)
+        )
+    email.save(update_fields=[
+        'attempts', 'last_error', 'status', 'next_attempt'
+    ])
+
+
+def claim_batch(batch_size):
+    """Забирает пачку писем условным UPDATE с меткой вызова: письмо
+    достаётся только одной из одновременно работающих задач.
+    Письма, взятые упавшей задачей, через TASK_TIMEOUT берутся снова."""
+    now = timezone.now()
+    deadline = now - timedelta(seconds=settings.TASK_TIMEOUT)
+    OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING, claimed__lt=deadline
+    ).update(status=OutgoingEmail.PENDING)
+    candidates = list(OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING, next_attempt__lte=now
+    ).order_by('id').values_list('pk', flat=True)[:batch_size])
+    if not candidates:
+        return []
+    token = secrets.token_hex(16)
+    OutgoingEmail.objects.filter(
+        pk__in=candidates, status=OutgoingEmail.PENDING
+    ).update(status=OutgoingEmail.SENDING, claim=token, claimed=now)
+    return list(OutgoingEmail.objects.filter(
+        claim=token, status=OutgoingEmail.SENDING
+    ).order_by('id'))
+
+
+def send_batch(batch_size=None):
+    """Отправляет пачку писем через одно соединение транспорта.
+
+    Письмо, которое не удалось отправить, откладывается с растущей
+    паузой, а после EMAIL_MAX_ATTEMPTS попыток помечается
+    недоставленным. Возвращает число отправленных писем.
+    """
+    batch = claim_batch(batch_size or settings.EMAIL_BATCH_SIZE)
+    if not batch:
+        return 0
+    connection = get_connection(settings.EMAIL_TRANSPORT_BACKEND)
+    sent = []
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            fail(email, f'Соединение: {error}')
+        return 0
+    try:
+        for email in batch:
+            try:
+                connection.send_messages([build_message(email)])
+            except Exception as error:
+                fail(email, repr(error))
+            else:
+                sent.append(email.pk)
+    finally:
+        connection.close()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent=timezone.now(),
+        attempts=F('attempts') + 1
+    )
+    metrics.inc('emails_sent_total', len(sent))
+    return len(sent)
+
+
+def flush():
+    """Задача: отправить одну пачку и запланировать следующую,
+    если в очереди ещё есть письма."""
+    send_batch()
+    upcoming = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING
+    ).order_by('next_attempt').values_list('next_attempt', flat=True).first()
+    if upcoming is not None:
+        delay = (upcoming - timezone.now()).total_seconds()
+        schedule_flush(countdown=max(delay, 0))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from core.mail import schedule_flush, send_batch
+from core.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Состояние очереди писем; отправка и повтор недоставленных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--send', action='store_true',
+            help='Отправить всё, что готово, не дожидаясь воркеров'
+        )
+        parser.add_argument(
+            '--retry-dead', action='store_true',
+            help='Вернуть недоставленные письма в очередь'
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            revived = OutgoingEmail.objects.filter(
+                status=OutgoingEmail.DEAD
+            ).update(
+                status=OutgoingEmail.PENDING, attempts=0,
+                next_attempt=timezone.now()
+            )
+            if revived:
+                schedule_flush()
+            self.stdout.write(f'Возвращено в очередь: {revived}')
+        if options['send']:
+            total = 0
+            while True:
+                sent = send_batch()
+                if not sent:
+                    break
+                total += sent
+            self.stdout.write(f'Отправлено: {total}')
+        counts = OutgoingEmail.objects.values('status').annotate(
+            count=Count('id')
+        ).order_by('status')
+        for row in counts:
+            self.stdout.write(f'  {row["status"]}: {row["count"]}')
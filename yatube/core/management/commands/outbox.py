@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import ConsumerOffset
+from core.outbox import head, prune
+
+
+class Command(BaseCommand):
+    help = 'Показывает позиции потребителей ленты событий и их отставание'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Удалить события, обработанные всеми потребителями'
+        )
+
+    def handle(self, *args, **options):
+        latest = head()
+        self.stdout.write(f'Последнее событие: {latest}')
+        for offset in ConsumerOffset.objects.order_by('name'):
+            self.stdout.write(
+                f'  {offset.name}: {offset.position}, '
+                f'отставание {latest - offset.position}'
+            )
+        if options['prune']:
+            self.stdout.write(f'Удалено событий: {prune()}')
@@ -0,0 +1,36 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sse import serve
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает сервер Server-Sent Events, который раздаёт события '
+        'журнала изменений; за прокси он обслуживает settings.SSE_URL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.SSE_HOST)
+        parser.add_argument('--port', type=int, default=settings.SSE_PORT)
+        parser.add_argument(
+            '--log', default=settings.CHANGELOG_FILE,
+            help='Путь к журналу изменений'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'SSE: http://{options["host"]}:{options["port"]}/'
+        )
+        try:
+            asyncio.run(serve(
+                options['host'], options['port'], options['log'],
+                heartbeat=settings.SSE_HEARTBEAT,
+                interval=settings.SSE_POLL_INTERVAL,
+                queue_size=settings.SSE_QUEUE_SIZE,
+                max_size=settings.CHANGELOG_MAX_SIZE,
+            ))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,60 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.taskqueue import Worker
+
+
+def run_worker(threads, poll_interval, burst):
+    worker = Worker(threads, poll_interval, burst)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stopping.set())
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры фоновых задач из core.taskqueue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=settings.TASK_WORKER_PROCESSES
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.TASK_WORKER_THREADS,
+            help='Потоков в каждом процессе'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=settings.TASK_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, секунды'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет'
+        )
+
+    def handle(self, *args, **options):
+        worker_args = (options['threads'], options['poll'], options['burst'])
+        if options['processes'] <= 1:
+            Worker(*worker_args).run()
+            return
+        # Соединения с базой не должны наследоваться дочерними процессами.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=run_worker, args=worker_args)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(
+            f'Воркеров: {len(processes)} x {options["threads"]} потоков'
+        )
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
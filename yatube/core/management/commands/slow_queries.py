@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import read_log, summarize
+
+
+class Command(BaseCommand):
+    help = 'Показывает самые дорогие запросы из журнала медленных запросов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько отпечатков показать'
+        )
+        parser.add_argument(
+            '--log', default=settings.SLOW_QUERY_LOG_FILE,
+            help='Путь к журналу'
+        )
+        parser.add_argument(
+            '--plans', action='store_true',
+            help='Выводить план запроса'
+        )
+
+    def handle(self, *args, **options):
+        summary = summarize(read_log(options['log']))
+        if not summary:
+            self.stdout.write('Медленных запросов не найдено')
+            return
+        for item in summary[:options['top']]:
+            self.stdout.write(self.style.SQL_KEYWORD(
+                f"{item['fingerprint']}  всего {item['total_ms']:.1f} мс, "
+                f"запросов {item['count']}, "
+                f"макс. {item['max_ms']:.1f} мс"
+            ))
+            self.stdout.write(f"  {item['sql']}")
+            if item['views']:
+                self.stdout.write(
+                    '  view: ' + ', '.join(sorted(item['views']))
+                )
+            if item['templates']:
+                self.stdout.write(
+                    '  шаблон: ' + ', '.join(sorted(item['templates']))
+                )
+            if options['plans'] and item['plan']:
+                for line in item['plan']:
+                    self.stdout.write(f'    {line}')
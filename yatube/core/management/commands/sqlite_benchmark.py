@@ -0,0 +1,121 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import apply_pragmas, is_locked_error
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения и записи SQLite '
+        'под конкурентной нагрузкой для профилей PRAGMA'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append',
+            help='Профиль из SQLITE_PROFILES; по умолчанию все'
+        )
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--rows', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        profiles = options['profile'] or list(settings.SQLITE_PROFILES)
+        for name in profiles:
+            result = self.run_profile(
+                settings.SQLITE_PROFILES[name], options
+            )
+            self.stdout.write(
+                f'{name:>12}: чтений/с {result["reads"]:>9.0f}, '
+                f'записей/с {result["writes"]:>7.0f}, '
+                f'ошибок блокировки {result["locked"]}'
+            )
+
+    def run_profile(self, profile, options):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'bench.sqlite3')
+        try:
+            self.prepare(path, profile, options['rows'])
+            counters = {'reads': 0, 'writes': 0, 'locked': 0}
+            lock = threading.Lock()
+            stop = time.monotonic() + options['seconds']
+            threads = [
+                threading.Thread(
+                    target=self.worker,
+                    args=(path, profile, stop, counters, lock, writer)
+                )
+                for writer in (
+                    [False] * options['readers']
+                    + [True] * options['writers']
+                )
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        seconds = options['seconds']
+        return {
+            'reads': counters['reads'] / seconds,
+            'writes': counters['writes'] / seconds,
+            'locked': counters['locked'],
+        }
+
+    def connect(self, path, profile):
+        # timeout=0: ожидание блокировки задаёт только busy_timeout профиля.
+        connection = sqlite3.connect(path, timeout=0, isolation_level=None)
+        apply_pragmas(connection.cursor(), profile)
+        return connection
+
+    def prepare(self, path, profile, rows):
+        connection = self.connect(path, profile)
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, author INTEGER, '
+            'text TEXT, pub_date REAL)'
+        )
+        connection.execute('CREATE INDEX post_author ON post (author)')
+        connection.executemany(
+            'INSERT INTO post (author, text, pub_date) VALUES (?, ?, ?)',
+            ((i % 100, 'x' * 200, time.time()) for i in range(rows))
+        )
+        connection.close()
+
+    def worker(self, path, profile, stop, counters, lock, writer):
+        connection = self.connect(path, profile)
+        done = locked = 0
+        author = 0
+        while time.monotonic() < stop:
+            author = (author + 7) % 100
+            try:
+                if writer:
+                    connection.execute('BEGIN IMMEDIATE')
+                    connection.execute(
+                        'INSERT INTO post (author, text, pub_date) '
+                        'VALUES (?, ?, ?)', (author, 'y' * 200, time.time())
+                    )
+                    connection.execute('COMMIT')
+                else:
+                    connection.execute(
+                        'SELECT id, text FROM post WHERE author = ? '
+                        'ORDER BY pub_date DESC LIMIT 10', (author,)
+                    ).fetchall()
+                done += 1
+            except sqlite3.OperationalError as error:
+                if not is_locked_error(error):
+                    raise
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                locked += 1
+        connection.close()
+        with lock:
+            counters['writes' if writer else 'reads'] += done
+            counters['locked'] += locked
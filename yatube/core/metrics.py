@@ -0,0 +1,56 @@
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_collectors = []
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Увеличивает счётчик процесса."""
+    with _lock:
+        _counters[(name, _labels_key(labels))] += value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[(name, _labels_key(labels))] = value
+
+
+def register_collector(collector):
+    """Добавляет функцию, которая при сборе метрик возвращает
+    последовательность (имя, метки, значение)."""
+    if collector not in _collectors:
+        _collectors.append(collector)
+    return collector
+
+
+def collect():
+    with _lock:
+        samples = [
+            (name, dict(labels), value)
+            for (name, labels), value in (
+                list(_counters.items()) + list(_gauges.items())
+            )
+        ]
+    for collector in _collectors:
+        samples.extend(collector())
+    return sorted(samples, key=lambda sample: sample[0])
+
+
+def render():
+    """Метрики в текстовом формате Prometheus."""
+    lines = []
+    for name, labels, value in collect():
+        if labels:
+            pairs = ','.join(
+                f'{key}="{labels[key]}"' for key in sorted(labels)
+            )
+            name = f'{name}{{{pairs}}}'
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
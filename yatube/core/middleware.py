@@ -0,0 +1,77 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import overload, routers
+from .slow_queries import SlowQueryLog
+
+
+class SlowQueryLogMiddleware:
+    """Пишет в журнал медленные запросы к БД, выполненные за запрос."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    SlowQueryLog(connection, request)
+                ))
+            return self.get_response(request)
+
+
+class ReadYourWritesMiddleware:
+    """Закрепляет за основной базой клиентов, которые недавно писали."""
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        cookie = settings.REPLICA_PIN_COOKIE
+        try:
+            pinned_until = float(request.COOKIES.get(cookie, 0))
+        except ValueError:
+            pinned_until = 0
+        if (
+            pinned_until > time.time()
+            or request.method not in self.safe_methods
+        ):
+            routers.pin_to_primary()
+        try:
+            response = self.get_response(request)
+            if routers.has_written():
+                seconds = settings.REPLICA_PIN_SECONDS
+                response.set_cookie(
+                    cookie, str(time.time() + seconds),
+                    max_age=seconds, httponly=True
+                )
+            return response
+        finally:
+            routers.reset()
+
+
+class LoadSheddingMiddleware:
+    """Защищает тяжёлые представления от перегрузки, см. core.overload."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        limiter = overload.get_limiter(request.resolver_match.view_name)
+        if limiter is None:
+            return None
+        return overload.run_limited(
+            limiter, request,
+            lambda: view_func(request, *view_args, **view_kwargs)
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['finished'], name='task_finished_idx'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:41
+
+import json
+import pickle
+
+from django.db import migrations, models
+
+
+def unpickle_messages(apps, schema_editor):
+    """Раскладывает сохранённые EmailMessage по полям; пока модель
+    не поменялась, pickle из старых строк ещё читается."""
+    OutgoingEmail = apps.get_model('core', 'OutgoingEmail')
+    for email in OutgoingEmail.objects.exclude(status='sent'):
+        message = pickle.loads(email.message)
+        email.body = message.body
+        email.content_subtype = message.content_subtype
+        email.from_email = message.from_email
+        email.to = json.dumps(message.to)
+        email.cc = json.dumps(message.cc)
+        email.bcc = json.dumps(message.bcc)
+        email.reply_to = json.dumps(message.reply_to)
+        email.headers = json.dumps(message.extra_headers)
+        email.alternatives = json.dumps(
+            getattr(message, 'alternatives', [])
+        )
+        email.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_task_finished_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='content_subtype',
+            field=models.CharField(default='plain', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='from_email',
+            field=models.CharField(default='', max_length=254),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='to',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='cc',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='bcc',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='reply_to',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='headers',
+            field=models.TextField(default='{}'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='alternatives',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='claim',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ждёт отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('dead', 'Не доставлено')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(unpickle_messages, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='outgoingemail',
+            name='message',
+        ),
+    ]
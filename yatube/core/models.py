@@ -0,0 +1,128 @@
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """Событие об изменении данных; пишется в той же транзакции,
+    что и само изменение. id служит смещением в ленте событий."""
+    topic = models.CharField(max_length=100, db_index=True)
+    object_id = models.PositiveIntegerField()
+    payload = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.pk} {self.topic} {self.object_id}'
+
+
+class ConsumerOffset(models.Model):
+    """Позиция потребителя ленты событий: id последнего обработанного."""
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
+
+
+class Task(models.Model):
+    """Фоновая задача очереди (см. core.taskqueue)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.TextField(default='[]')
+    priority = models.SmallIntegerField(default=0)
+    dedup_key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='task_queue_idx'
+            ),
+            models.Index(fields=['finished'], name='task_finished_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_task'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (см. core.mail).
+
+    Хранятся поля письма, а не объект EmailMessage, чтобы строки
+    очереди не зависели от версий Django и Python.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUSES = (
+        (PENDING, 'Ждёт отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (DEAD, 'Не доставлено'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    # html или plain
+    content_subtype = models.CharField(max_length=20, default='plain')
+    from_email = models.CharField(max_length=254)
+    # Списки адресов, заголовки и альтернативы тела в JSON.
+    to = models.TextField(default='[]')
+    cc = models.TextField(default='[]')
+    bcc = models.TextField(default='[]')
+    reply_to = models.TextField(default='[]')
+    headers = models.TextField(default='{}')
+    alternatives = models.TextField(default='[]')
+    recipients = models.TextField()
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING
+    )
+    # Метка отправляющей задачи и время, когда она взяла письмо.
+    claim = models.CharField(max_length=32, blank=True)
+    claimed = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'], name='email_outbox_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients} ({self.status})'
@@ -0,0 +1,135 @@
+import json
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.db.models.signals import post_delete, post_save
+
+from . import metrics
+from .models import ConsumerOffset, OutboxEvent
+
+
+class Event:
+    __slots__ = ('id', 'topic', 'object_id', 'data', 'created')
+
+    def __init__(self, row):
+        self.id, self.topic, self.object_id, payload, self.created = row
+        self.data = json.loads(payload)
+
+    def __repr__(self):
+        return f'<Event {self.id} {self.topic} {self.object_id}>'
+
+
+def emit(topic, object_id, data):
+    """Добавляет событие в ленту. Вызывается внутри транзакции записи,
+    поэтому событие фиксируется или откатывается вместе с ней."""
+    OutboxEvent.objects.create(
+        topic=topic, object_id=object_id,
+        payload=json.dumps(data, ensure_ascii=False, default=str)
+    )
+
+
+def track(model, name, fields):
+    """Писать события `<name>.created|updated|deleted` с полями fields
+    при сохранении и удалении объектов model."""
+    def serialize(instance):
+        return {field: getattr(instance, field) for field in fields}
+
+    def saved(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        action = 'created' if created else 'updated'
+        emit(f'{name}.{action}', instance.pk, serialize(instance))
+
+    def deleted(sender, instance, **kwargs):
+        emit(f'{name}.deleted', instance.pk, serialize(instance))
+
+    post_save.connect(saved, sender=model, weak=False,
+                      dispatch_uid=f'outbox_{name}_saved')
+    post_delete.connect(deleted, sender=model, weak=False,
+                        dispatch_uid=f'outbox_{name}_deleted')
+
+
+class Consumer:
+    """Читатель ленты событий с сохраняемой позицией.
+
+    Пачка событий обрабатывается в одной транзакции с переносом
+    позиции, так что после сбоя обработка продолжится с той же пачки.
+    Записи в SQLite идут по одной, поэтому id фиксируются по порядку
+    и пропусков в ленте не бывает.
+    """
+
+    def __init__(self, name, topics=None, batch_size=100):
+        self.name = name
+        self.topics = topics
+        self.batch_size = batch_size
+
+    def position(self):
+        return ConsumerOffset.objects.filter(name=self.name).values_list(
+            'position', flat=True
+        ).first() or 0
+
+    def seek(self, position):
+        """Переставляет позицию, например на 0 для повторной обработки."""
+        ConsumerOffset.objects.update_or_create(
+            name=self.name, defaults={'position': position}
+        )
+
+    def fetch(self, after):
+        events = OutboxEvent.objects.filter(id__gt=after)
+        if self.topics is not None:
+            events = events.filter(topic__in=self.topics)
+        rows = events.order_by('id').values_list(
+            'id', 'topic', 'object_id', 'payload', 'created'
+        )[:self.batch_size]
+        return [Event(row) for row in rows]
+
+    def process(self, handler):
+        """Одна пачка: handler(events) и перенос позиции в транзакции.
+        Возвращает число обработанных событий."""
+        with transaction.atomic():
+            offset, _ = ConsumerOffset.objects.select_for_update(
+            ).get_or_create(name=self.name)
+            events = self.fetch(offset.position)
+            if not events:
+                return 0
+            handler(events)
+            offset.position = events[-1].id
+            offset.save()
+        metrics.inc('outbox_events_consumed_total', len(events),
+                    consumer=self.name)
+        return len(events)
+
+    def run(self, handler):
+        """Обрабатывает все накопившиеся события пачками."""
+        total = 0
+        while True:
+            processed = self.process(handler)
+            if not processed:
+                return total
+            total += processed
+
+
+def head():
+    return OutboxEvent.objects.aggregate(head=Max('id'))['head'] or 0
+
+
+def prune():
+    """Удаляет события, уже обработанные всеми потребителями."""
+    low = ConsumerOffset.objects.aggregate(low=Min('position'))['low']
+    if low is None:
+        return 0
+    deleted, _ = OutboxEvent.objects.filter(id__lte=low).delete()
+    return deleted
+
+
+def collect_metrics():
+    latest = head()
+    return [
+        ('outbox_consumer_lag', {'consumer': name}, latest - position)
+        for name, position in ConsumerOffset.objects.values_list(
+            'name', 'position'
+        )
+    ]
+
+
+metrics.register_collector(collect_metrics)
@@ -0,0 +1,193 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError
+from django.http import HttpResponse
+
+from . import metrics
+from .cache import get_stale
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class Limiter:
+    """Ограничивает число одновременных запросов класса представлений.
+
+    Сверх лимита запросы ждут в очереди не дольше queue_timeout секунд;
+    если очередь заполнена, запрос сразу отклоняется.
+    """
+
+    def __init__(self, name, max_concurrency, max_queue, queue_timeout,
+                 slow_threshold):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.slow_threshold = slow_threshold
+        self.semaphore = threading.BoundedSemaphore(max_concurrency or 1)
+        if not max_concurrency:
+            self.semaphore.acquire()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.latency = 0.0
+
+    def acquire(self):
+        acquired = self.semaphore.acquire(blocking=False)
+        if not acquired:
+            with self.lock:
+                if self.waiting >= self.max_queue:
+                    return False
+                self.waiting += 1
+            try:
+                acquired = self.semaphore.acquire(timeout=self.queue_timeout)
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+        if acquired:
+            with self.lock:
+                self.active += 1
+        return acquired
+
+    def release(self, duration):
+        with self.lock:
+            self.active -= 1
+            # Скользящее среднее времени ответа.
+            self.latency = 0.8 * self.latency + 0.2 * duration
+        self.semaphore.release()
+
+    @property
+    def degraded(self):
+        return self.latency > self.slow_threshold
+
+
+def get_limiter(view_name):
+    """Ограничитель класса, к которому относится представление."""
+    for name, config in settings.OVERLOAD_PROTECTION.items():
+        if view_name not in config['views']:
+            continue
+        key = (name, tuple(sorted(
+            (option, value) for option, value in config.items()
+            if option != 'views'
+        )))
+        with _limiters_lock:
+            if key not in _limiters:
+                _limiters[key] = Limiter(
+                    name,
+                    config['max_concurrency'],
+                    config['max_queue'],
+                    config['queue_timeout'],
+                    config['slow_threshold'],
+                )
+            return _limiters[key]
+    return None
+
+
+def stale_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return 'swr:' + path
+
+
+def store_rendering(request, response):
+    """Запоминает последнюю удачную отрисовку страницы.
+
+    Перезаписывается не чаще раза в OVERLOAD_STALE_REFRESH секунд.
+    """
+    key = stale_key(request)
+    if cache.add(key + ':fresh', 1, settings.OVERLOAD_STALE_REFRESH):
+        cache.set(
+            key,
+            (response.content, response['Content-Type']),
+            settings.OVERLOAD_STALE_TIMEOUT
+        )
+
+
+def stale_response(request):
+    stored = get_stale(cache, stale_key(request))
+    if stored is None:
+        return None
+    content, content_type = stored
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'STALE'
+    return response
+
+
+def unavailable_response():
+    response = HttpResponse(
+        'Сервис перегружен, попробуйте позже.', status=503
+    )
+    response['Retry-After'] = str(settings.OVERLOAD_RETRY_AFTER)
+    return response
+
+
+def collect_metrics():
+    samples = []
+    for (name, _), limiter in list(_limiters.items()):
+        labels = {'view_class': name}
+        samples.extend([
+            ('overload_active_requests', labels, limiter.active),
+            ('overload_queued_requests', labels, limiter.waiting),
+            ('overload_latency_seconds', labels, round(limiter.latency, 4)),
+            ('overload_max_concurrency', labels, limiter.max_concurrency),
+            ('overload_max_queue', labels, limiter.max_queue),
+            ('overload_queue_timeout_seconds', labels,
+             limiter.queue_timeout),
+            ('overload_slow_threshold_seconds', labels,
+             limiter.slow_threshold),
+        ])
+    return samples
+
+
+def can_use_stale(request):
+    """Устаревшую страницу можно отдать только анонимному GET-запросу:
+    у авторизованных пользователей она персональная."""
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def run_limited(limiter, request, view):
+    """Выполняет представление под ограничителем; при перегрузке или
+    ошибке БД отдаёт последнюю удачную отрисовку либо 503."""
+    labels = {'view_class': limiter.name}
+    use_stale = can_use_stale(request)
+    if use_stale and limiter.degraded and not cache.add(
+            stale_key(request) + ':revalidate', 1,
+            settings.OVERLOAD_STALE_REFRESH):
+        response = stale_response(request)
+        if response is not None:
+            metrics.inc('overload_stale_served_total', **labels)
+            return response
+    if not limiter.acquire():
+        metrics.inc('overload_rejected_total', **labels)
+        response = stale_response(request) if use_stale else None
+        if response is not None:
+            metrics.inc('overload_stale_served_total', **labels)
+            return response
+        return unavailable_response()
+    start = time.monotonic()
+    try:
+        response = view()
+    except OperationalError:
+        response = stale_response(request) if use_stale else None
+        if response is None:
+            raise
+        metrics.inc('overload_stale_served_total', **labels)
+        return response
+    finally:
+        limiter.release(time.monotonic() - start)
+    if (
+        use_stale
+        and response.status_code == 200
+        and not response.streaming
+    ):
+        store_rendering(request, response)
+    return response
+
+
+metrics.register_collector(collect_metrics)
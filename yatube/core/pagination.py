@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+from django.db.models import Q
+
+
+def encode_cursor(when, pk):
+    return f'{int(when.timestamp() * 1_000_000)}-{pk}'
+
+
+def decode_cursor(cursor):
+    """(время, id) из курсора или None, если курсор пуст или испорчен."""
+    try:
+        when, pk = (int(part) for part in cursor.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return datetime.fromtimestamp(when / 1_000_000, timezone.utc), pk
+
+
+def cursor_page(queryset, cursor, limit, time_field, pk_field='pk'):
+    """Страница по убыванию (time_field, pk_field) после курсора:
+    (объекты, курсор следующей страницы или None).
+
+    Курсор — время и id последнего показанного объекта, так что
+    страница читается по индексу без OFFSET на любой глубине.
+    """
+    queryset = queryset.order_by(f'-{time_field}', f'-{pk_field}')
+    position = decode_cursor(cursor)
+    if position is not None:
+        when, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__lt': when})
+            | Q(**{time_field: when, f'{pk_field}__lt': pk})
+        )
+    page = list(queryset[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    last = page[-1]
+    return page, encode_cursor(
+        getattr(last, time_field), getattr(last, pk_field)
+    )
@@ -0,0 +1,78 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import models
+
+from .versions import bump, get_table_versions, tracked_tables
+
+
+class VersionedQuerySet(models.QuerySet):
+    """QuerySet, массовые изменения через который меняют версию таблицы."""
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        bump(self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        bump(self.model)
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        super().bulk_update(*args, **kwargs)
+        bump(self.model)
+
+
+class CachingQuerySet(VersionedQuerySet):
+    """QuerySet, результаты которого кешируются.
+
+    Ключ строится из SQL, параметров и версий всех таблиц запроса,
+    так что любая запись в эти таблицы даёт новый ключ. Запросы
+    к таблицам, версии которых не отслеживаются, не кешируются.
+    """
+
+    def _cache_key(self, kind):
+        query = self.query.clone()
+        try:
+            sql, params = query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        tables = sorted({
+            join.table_name for join in query.alias_map.values()
+        })
+        if not tables or not tracked_tables.issuperset(tables):
+            return None
+        versions = get_table_versions(*tables)
+        raw = f'{kind}|{self._iterable_class.__name__}|{sql}|{params!r}|'
+        raw += repr(versions)
+        return 'qc:' + hashlib.md5(raw.encode()).hexdigest()
+
+    def _cached(self, kind, compute):
+        key = self._cache_key(kind)
+        if key is None:
+            return compute()
+        cache = caches[settings.QUERY_CACHE_ALIAS]
+        return cache.get_or_set(key, compute, settings.QUERY_CACHE_TIMEOUT)
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = self._cached(
+                'rows', lambda: list(self._iterable_class(self))
+            )
+        if self._prefetch_related_lookups and not self._prefetch_done:
+            self._prefetch_related_objects()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._cached('count', super().count)
+
+    def exists(self):
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        return self._cached('exists', super().exists)
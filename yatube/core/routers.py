@@ -0,0 +1,50 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+state = threading.local()
+
+
+def reset():
+    state.pinned = False
+    state.wrote = False
+
+
+def pin_to_primary():
+    state.pinned = True
+
+
+def is_pinned():
+    return getattr(state, 'pinned', False)
+
+
+def has_written():
+    return getattr(state, 'wrote', False)
+
+
+class PrimaryReplicaRouter:
+    """Отправляет чтение на реплики, а запись — на основную базу.
+
+    Клиент, который недавно что-то записал, читает только с основной базы,
+    чтобы сразу видеть свои посты и комментарии.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or is_pinned()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
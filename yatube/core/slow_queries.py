@@ -0,0 +1,150 @@
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.template.base import Template
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Приводит SQL к виду без литералов и параметров."""
+    sql = STRING_LITERAL_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Короткий отпечаток нормализованного запроса."""
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def current_template():
+    """Имя шаблона, при рендеринге которого выполнился запрос."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        candidate = frame.f_locals.get('self')
+        if isinstance(candidate, Template):
+            return candidate.name
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """Обёртка для connection.execute_wrapper.
+
+    Запросы дольше порога пишутся в журнал построчно в JSON;
+    план запроса снимается при первой встрече отпечатка в процессе.
+    """
+
+    explained = set()
+    lock = threading.Lock()
+    local = threading.local()
+
+    def __init__(self, connection, request=None):
+        self.connection = connection
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self.local, 'explaining', False):
+            return execute(sql, params, many, context)
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.monotonic() - start
+            if duration >= self.threshold:
+                self.record(sql, params, many, duration)
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else None
+
+    def record(self, sql, params, many, duration):
+        key = fingerprint(sql)
+        entry = {
+            'fingerprint': key,
+            'sql': normalize_sql(sql),
+            'duration_ms': round(duration * 1000, 3),
+            'view': self.view_name(),
+            'template': current_template(),
+            'time': time.time(),
+        }
+        with self.lock:
+            first_seen = key not in self.explained
+            self.explained.add(key)
+        if first_seen and not many:
+            entry['plan'] = self.explain(sql, params)
+        with self.lock, open(settings.SLOW_QUERY_LOG_FILE, 'a') as log:
+            log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def explain(self, sql, params):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+        if self.connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        else:
+            prefix = 'EXPLAIN '
+        self.local.explaining = True
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                return [
+                    ' '.join(str(column) for column in row)
+                    for row in cursor.fetchall()
+                ]
+        except Exception as error:
+            return [f'EXPLAIN failed: {error}']
+        finally:
+            self.local.explaining = False
+
+
+def read_log(path):
+    """Читает журнал медленных запросов, пропуская битые строки."""
+    try:
+        with open(path) as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def summarize(entries):
+    """Группирует записи журнала по отпечаткам."""
+    summary = {}
+    for entry in entries:
+        item = summary.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'sql': entry['sql'],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': set(),
+            'templates': set(),
+            'plan': None,
+        })
+        item['count'] += 1
+        item['total_ms'] += entry['duration_ms']
+        item['max_ms'] = max(item['max_ms'], entry['duration_ms'])
+        if entry.get('view'):
+            item['views'].add(entry['view'])
+        if entry.get('template'):
+            item['templates'].add(entry['template'])
+        if item['plan'] is None and entry.get('plan'):
+            item['plan'] = entry['plan']
+    return sorted(
+        summary.values(), key=lambda item: item['total_ms'], reverse=True
+    )
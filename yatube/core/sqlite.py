@@ -0,0 +1,60 @@
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+# Порядок важен: journal_mode переключаем до остальных настроек.
+PRAGMA_ORDER = (
+    'journal_mode', 'busy_timeout', 'synchronous', 'mmap_size', 'cache_size',
+)
+
+write_lock = threading.RLock()
+
+
+def get_profile(name=None):
+    """Набор PRAGMA для профиля из settings.SQLITE_PROFILES."""
+    return settings.SQLITE_PROFILES[name or settings.SQLITE_PROFILE]
+
+
+def apply_pragmas(cursor, profile):
+    for pragma in PRAGMA_ORDER:
+        if pragma in profile:
+            cursor.execute(f'PRAGMA {pragma} = {profile[pragma]}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created: настраивает новое соединение SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, get_profile())
+
+
+def is_locked_error(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def retry_on_locked(write):
+    """Выполняет запись в транзакции и повторяет её при блокировке БД.
+
+    Оборачивает только саму запись, а не view целиком: при повторе
+    не должны заново выполняться чтение запроса, загрузка файлов
+    и прочие побочные действия. Внутри процесса записи идут
+    по очереди, между процессами спорные случаи разруливаются
+    короткими повторами с растущей паузой.
+    """
+    @functools.wraps(write)
+    def wrapper(*args, **kwargs):
+        attempts = settings.WRITE_RETRY_ATTEMPTS
+        for attempt in range(attempts):
+            try:
+                with write_lock, transaction.atomic():
+                    return write(*args, **kwargs)
+            except OperationalError as error:
+                if not is_locked_error(error) or attempt == attempts - 1:
+                    raise
+            time.sleep(settings.WRITE_RETRY_BACKOFF * 2 ** attempt)
+    return wrapper
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs, urlsplit
+
+from . import changelog
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    def __init__(self, topics, queue_size):
+        self.topics = set(topics)
+        self.queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+
+class Hub:
+    """Рассылает события журнала изменений подписчикам по темам.
+
+    Каждому подписчику — своя ограниченная очередь; отставший
+    подписчик отключается и переподключается с Last-Event-ID.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.offset = 0
+
+    def subscribe(self, topics):
+        subscriber = Subscriber(topics, self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event_id, event):
+        topics = set(event['topics'])
+        for subscriber in list(self.subscribers):
+            if not subscriber.topics & topics:
+                continue
+            try:
+                subscriber.queue.put_nowait((event_id, event['data']))
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+
+    async def tail(self, path, interval, max_size=None):
+        """Следит за журналом, публикует новые строки и ротирует
+        журнал, когда он дочитан и вырос больше max_size байт."""
+        loop = asyncio.get_event_loop()
+        self.offset = changelog.end(path)
+        while True:
+            current = changelog.end(path)
+            if current < self.offset:
+                # журнал удалили или заменили
+                self.offset = 0
+            if current > self.offset:
+                events = await loop.run_in_executor(
+                    None, changelog.read, self.offset, path
+                )
+                for event_id, event in events:
+                    self.publish(event_id, event)
+                    self.offset = event_id
+            elif max_size and changelog.size(path) >= max_size:
+                changelog.rotate(path)
+            await asyncio.sleep(interval)
+
+
+def format_event(event_id, data):
+    return 'id: {}\nevent: post\ndata: {}\n\n'.format(
+        event_id, json.dumps(data, ensure_ascii=False)
+    ).encode()
+
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    parts = request_line.decode('latin-1').split()
+    target = parts[1] if len(parts) > 1 else '/'
+    return parse_qs(urlsplit(target).query), headers
+
+
+async def replay(hub, subscriber, writer, path, last_id):
+    """Досылает пропущенные после Last-Event-ID события,
+    которые уже разосланы остальным подписчикам."""
+    sent = 0
+    if not last_id.isdigit():
+        return sent
+    missed = await asyncio.get_event_loop().run_in_executor(
+        None, changelog.read, int(last_id), path
+    )
+    for event_id, event in missed:
+        if event_id > hub.offset:
+            break
+        if subscriber.topics & set(event['topics']):
+            writer.write(format_event(event_id, event['data']))
+        sent = event_id
+    return sent
+
+
+async def handle_client(hub, reader, writer, path, heartbeat):
+    """Одно SSE-соединение: только корутина и очередь,
+    без потока и соединения с базой."""
+    subscriber = None
+    try:
+        query, headers = await read_request(reader)
+        topics = query.get('topic', [])
+        if not topics:
+            writer.write(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            return
+        subscriber = hub.subscribe(topics)
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/event-stream; charset=utf-8\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'X-Accel-Buffering: no\r\n'
+            b'Connection: keep-alive\r\n\r\n'
+        )
+        sent = await replay(
+            hub, subscriber, writer, path, headers.get('last-event-id', '')
+        )
+        await writer.drain()
+        while not subscriber.overflowed:
+            try:
+                event_id, data = await asyncio.wait_for(
+                    subscriber.queue.get(), heartbeat
+                )
+            except asyncio.TimeoutError:
+                writer.write(b': ping\n\n')
+            else:
+                if event_id > sent:
+                    writer.write(format_event(event_id, data))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        if subscriber is not None:
+            hub.unsubscribe(subscriber)
+        writer.close()
+
+
+async def serve(host, port, path, heartbeat=15, interval=0.5,
+                queue_size=100, max_size=None):
+    hub = Hub(queue_size)
+    tailer = asyncio.create_task(hub.tail(path, interval, max_size))
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client(
+            hub, reader, writer, path, heartbeat
+        ),
+        host, port
+    )
+    logger.info('SSE на %s:%s', host, port)
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            tailer.cancel()
@@ -0,0 +1,288 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class TaskFunction:
+    """Функция, зарегистрированная как фоновая задача."""
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def delay(self, *args, dedup_key=None, priority=None, countdown=0):
+        return enqueue(
+            self.name, args,
+            dedup_key=dedup_key,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            countdown=countdown,
+        )
+
+
+def task(name=None, priority=0, max_attempts=None):
+    """Регистрирует функцию как задачу; аргументы должны
+    сериализоваться в JSON. Вызов через .delay(*args) ставит её
+    в очередь, обычный вызов выполняет сразу."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = TaskFunction(
+            func, task_name, priority,
+            max_attempts or settings.TASK_MAX_ATTEMPTS
+        )
+        return registry[task_name]
+    return decorator
+
+
+def enqueue(name, args=(), dedup_key=None, priority=0, max_attempts=None,
+            countdown=0):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Если задача с тем же dedup_key ещё ждёт выполнения, новая
+    не создаётся и возвращается ожидающая.
+    """
+    fields = {
+        'name': name,
+        'args': json.dumps(list(args)),
+        'priority': priority,
+        'dedup_key': dedup_key,
+        'max_attempts': max_attempts or settings.TASK_MAX_ATTEMPTS,
+        'run_at': timezone.now() + timedelta(seconds=countdown),
+    }
+    if dedup_key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(**fields)
+    except IntegrityError:
+        metrics.inc('tasks_deduplicated_total', task=name)
+        return Task.objects.get(dedup_key=dedup_key, status=Task.PENDING)
+
+
+def backoff(attempts):
+    """Пауза перед повтором: экспонента от числа попыток со случайной
+    добавкой, чтобы повторы упавших вместе задач не совпадали."""
+    delay = settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return delay * (1 + random.random() / 2)
+
+
+def claim(worker):
+    """Забирает самую срочную готовую задачу. Взятие — условный UPDATE,
+    поэтому задачу получает ровно один из конкурирующих потоков."""
+    while True:
+        candidate = Task.objects.filter(
+            status=Task.PENDING, run_at__lte=timezone.now()
+        ).order_by('-priority', 'run_at', 'id').values_list(
+            'pk', flat=True
+        ).first()
+        if candidate is None:
+            return None
+        claimed = Task.objects.filter(
+            pk=candidate, status=Task.PENDING
+        ).update(
+            status=Task.RUNNING, worker=worker, started=timezone.now(),
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Task.objects.get(pk=candidate)
+
+
+def execute(task_row):
+    """Выполняет взятую задачу и записывает результат."""
+    try:
+        registry[task_row.name](*json.loads(task_row.args))
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s упала:\n%s', task_row, error)
+        retry(task_row, error)
+        return False
+    Task.objects.filter(pk=task_row.pk).update(
+        status=Task.DONE, finished=timezone.now(), last_error=''
+    )
+    return True
+
+
+def retry(task_row, error):
+    if task_row.attempts >= task_row.max_attempts:
+        status, run_at = Task.FAILED, task_row.run_at
+    else:
+        status = Task.PENDING
+        run_at = timezone.now() + timedelta(
+            seconds=backoff(task_row.attempts)
+        )
+    try:
+        with transaction.atomic():
+            Task.objects.filter(pk=task_row.pk).update(
+                status=status, run_at=run_at, last_error=error,
+                finished=timezone.now()
+            )
+    except IntegrityError:
+        # Пока задача выполнялась, такую же поставили в очередь заново.
+        status = Task.DONE
+        Task.objects.filter(pk=task_row.pk).update(
+            status=status, last_error=error, finished=timezone.now()
+        )
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, зависшие у упавших воркеров."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASK_TIMEOUT)
+    stale = Task.objects.filter(status=Task.RUNNING, started__lt=deadline)
+    for task_row in stale:
+        retry(task_row, 'Превышено время выполнения')
+
+
+def prune_finished():
+    """Удаляет выполненные и упавшие задачи старше TASK_KEEP_FINISHED."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASK_KEEP_FINISHED
+    )
+    deleted, _ = Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED), finished__lt=deadline
+    ).delete()
+    return deleted
+
+
+def run_pending(worker='inline'):
+    """Выполняет все готовые задачи в текущем потоке."""
+    autodiscover_modules('tasks')
+    done = 0
+    while True:
+        task_row = claim(worker)
+        if task_row is None:
+            return done
+        execute(task_row)
+        done += 1
+
+
+class Worker:
+    """Процесс-воркер: несколько потоков, разбирающих очередь."""
+
+    def __init__(self, threads, poll_interval, burst=False):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stopping = threading.Event()
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+
+    def loop(self, number):
+        worker = f'{self.name}:{number}'
+        failures = 0
+        while not self.stopping.is_set():
+            close_old_connections()
+            try:
+                task_row = claim(worker)
+                if task_row is not None:
+                    execute(task_row)
+            except Exception:
+                # Ошибка базы не должна убивать поток: взятая задача
+                # вернётся в очередь при очередном обслуживании
+                # в run(), через TASK_TIMEOUT после взятия.
+                failures += 1
+                logger.exception('Сбой воркера %s', worker)
+                self.stopping.wait(min(backoff(failures), 60))
+                continue
+            failures = 0
+            if task_row is not None:
+                continue
+            if self.burst:
+                break
+            self.stopping.wait(self.poll_interval)
+        close_old_connections()
+
+    def maintain(self):
+        """Возвращает в очередь брошенные задачи и удаляет старые
+        выполненные. Сбой не останавливает воркер: повторится
+        на следующем круге."""
+        close_old_connections()
+        try:
+            requeue_stale()
+            prune_finished()
+        except Exception:
+            logger.exception('Сбой обслуживания очереди %s', self.name)
+
+    def run(self):
+        autodiscover_modules('tasks')
+        self.maintain()
+        maintained = time.monotonic()
+        threads = [
+            threading.Thread(target=self.loop, args=(number,), daemon=True)
+            for number in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                if time.monotonic() - maintained >= settings.TASK_TIMEOUT / 2:
+                    self.maintain()
+                    maintained = time.monotonic()
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            self.stopping.set()
+        for thread in threads:
+            thread.join()
+
+
+def collect_metrics():
+    """Метрики очереди считаются по строкам Task, поэтому результаты
+    воркеров видны в /metrics/ любого веб-процесса."""
+    now = timezone.now()
+    pending = Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+    samples = []
+    for row in pending.values('name').annotate(
+        count=Count('id'), oldest=Min('run_at')
+    ):
+        labels = {'task': row['name']}
+        samples.append(('task_queue_ready', labels, row['count']))
+        samples.append((
+            'task_queue_oldest_seconds', labels,
+            (now - row['oldest']).total_seconds()
+        ))
+    since = now - timedelta(seconds=settings.TASK_METRICS_WINDOW)
+    finished = defaultdict(int)
+    latency = defaultdict(lambda: [0, 0])
+    for name, status, run_at, started in Task.objects.filter(
+        finished__gte=since
+    ).values_list('name', 'status', 'run_at', 'started'):
+        finished[name, status] += 1
+        # у отложенного повтора run_at уже сдвинут вперёд
+        if started is not None and status != Task.PENDING:
+            latency[name][0] += max((started - run_at).total_seconds(), 0)
+            latency[name][1] += 1
+    for (name, status), count in finished.items():
+        samples.append((
+            'tasks_finished_recent', {'task': name, 'status': status}, count
+        ))
+    for name, (total, count) in latency.items():
+        labels = {'task': name}
+        samples.append(('task_queue_latency_seconds_sum', labels, total))
+        samples.append(('task_queue_latency_seconds_count', labels, count))
+    return samples
+
+
+metrics.register_collector(collect_metrics)
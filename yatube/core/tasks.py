@@ -0,0 +1,7 @@
+from . import mail
+from .taskqueue import task
+
+
+@task(mail.FLUSH_TASK, priority=1)
+def send_email_batch():
+    mail.flush()
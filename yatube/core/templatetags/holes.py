@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..holes import hole_marker, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, *args):
+    """Персональный фрагмент страницы.
+
+    На страницах, кешируемых целиком, вместо фрагмента выводится метка,
+    которую core.holes.fill_holes заменяет на каждом запросе.
+    """
+    request = context['request']
+    if getattr(request, 'punch_holes', False):
+        return mark_safe(hole_marker(name, args))
+    return render_hole(request, name, args)
@@ -0,0 +1,97 @@
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from ..cache import TieredCache, key_prefix
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache('tests', {
+            'OPTIONS': {
+                'SHARED_ALIAS': 'shared',
+                'LOCAL_MAX_ENTRIES': 2,
+                'EARLY_REFRESH_BETA': 1.0,
+            },
+        })
+        self.cache.clear()
+        self.cache._stats.clear()
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_local_tier_is_bounded_lru(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key)
+        self.assertEqual(len(self.cache._local), 2)
+        self.assertEqual(self.cache.get('a'), 'a')
+
+    def test_values_shared_between_processes(self):
+        self.cache.set('post:1', 'text')
+        self.cache._local.clear()
+        self.assertEqual(self.cache.get('post:1'), 'text')
+
+    def test_only_one_caller_recomputes_expired_entry(self):
+        self.cache.set('feed:index', 'old', timeout=1)
+        key = self.cache.make_key('feed:index')
+        value, _, delta = caches['shared'].get(key)
+        expired = (value, time.time() - 1, delta)
+        caches['shared'].set(key, expired)
+        self.cache._local.clear()
+        self.assertIsNone(self.cache.get('feed:index'))
+        self.cache._local.clear()
+        self.assertEqual(self.cache.get('feed:index'), 'old')
+        self.cache.set('feed:index', 'new')
+        self.assertEqual(self.cache.get('feed:index'), 'new')
+
+    def test_slow_entries_refreshed_early(self):
+        key = self.cache.make_key('feed:slow')
+        caches['shared'].set(key, ('value', time.time() + 1, 1000))
+        self.assertIsNone(self.cache.get('feed:slow'))
+        self.assertEqual(self.cache.stats()['feed']['early'], 1)
+
+    def test_stats_grouped_by_key_prefix(self):
+        self.cache.set('user:1', 'user')
+        self.cache.get('user:1')
+        self.cache.get('user:2')
+        self.assertEqual(
+            self.cache.stats()['user'], {
+                'hits': 1, 'misses': 1, 'stale': 0, 'early': 0
+            }
+        )
+        self.assertEqual(
+            key_prefix('template.cache.index_page.abc'),
+            'template.cache.index_page'
+        )
+
+    def test_cold_miss_takes_no_lock(self):
+        self.assertIsNone(self.cache.get('page:404'))
+        key = self.cache.make_key('page:404')
+        self.assertIsNone(caches['shared'].get('lock:' + key))
+        for number in range(5):
+            self.cache.get(f'page:{number}')
+        self.assertLessEqual(len(self.cache._miss_started), 2)
+
+    def test_lock_released_when_compute_fails(self):
+        self.cache.set('feed:fail', 'old', timeout=1)
+        key = self.cache.make_key('feed:fail')
+        value, _, delta = caches['shared'].get(key)
+        caches['shared'].set(key, (value, time.time() - 1, delta))
+        self.cache._local.clear()
+
+        def compute():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_set('feed:fail', compute)
+        self.assertIsNone(caches['shared'].get('lock:' + key))
+        self.assertEqual(self.cache.get_or_set('feed:fail', 'new'), 'new')
+
+    def test_add_replaces_expired_entry(self):
+        self.assertTrue(self.cache.add('mark:fresh', 1, 1))
+        self.assertFalse(self.cache.add('mark:fresh', 2, 1))
+        time.sleep(1.1)
+        self.assertIsNone(self.cache.get('mark:fresh'))
+        self.assertTrue(self.cache.add('mark:fresh', 3, 1))
+        self.assertEqual(self.cache.get('mark:fresh'), 3)
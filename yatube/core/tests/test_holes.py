@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+from .. import routers
+from ..holes import page_key
+
+User = get_user_model()
+
+
+class HolePunchedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_page_shared_between_users_with_personal_header(self):
+        url = reverse('posts:index')
+        self.author_client.get(url)
+        self.reader_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.reader_client.get(url)
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertNotContains(response, 'Пользователь: author')
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_follow_button_rendered_per_user(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.author_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Отписаться')
+        response = self.author_client.get(url)
+        self.assertNotContains(response, 'Подписаться')
+
+    def test_new_post_invalidates_cached_page(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.reader_client.get(url)
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertContains(self.reader_client.get(url), 'Свежий пост')
+
+    def test_author_and_comment_changes_invalidate_cached_page(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.reader_client.get(url)
+        self.author.first_name = 'Лев'
+        self.author.save()
+        routers.reset()
+        self.assertContains(self.reader_client.get(url), 'Лев')
+        models = (Post, Group, Comment, User)
+        key = page_key(RequestFactory().get(url), models)
+        Comment.objects.create(
+            post=Post.objects.first(), author=self.reader, text='Да'
+        )
+        self.assertNotEqual(page_key(RequestFactory().get(url), models), key)
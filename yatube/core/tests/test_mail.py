@@ -0,0 +1,129 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..mail import send_batch
+from ..models import OutgoingEmail, Task
+from ..taskqueue import run_pending
+
+User = get_user_model()
+
+MAIL_DIR = tempfile.mkdtemp()
+
+
+class BrokenBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('Сервер недоступен')
+
+
+class ConcurrentFlushBackend(BaseEmailBackend):
+    """Пока идёт отправка, запускается ещё одна задача отправки."""
+    sent = []
+    nested = []
+
+    def send_messages(self, email_messages):
+        if not self.nested:
+            self.nested.append(send_batch())
+        self.sent.extend(email_messages)
+        return len(email_messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxEmailBackend',
+    EMAIL_TRANSPORT_BACKEND='django.core.mail.backends.filebased'
+                            '.EmailBackend',
+    EMAIL_FILE_PATH=MAIL_DIR,
+    EMAIL_MAX_ATTEMPTS=2,
+    TASK_RETRY_BACKOFF=0,
+)
+class EmailOutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User.objects.create_user(
+            username='leo', email='leo@example.com', password='secret-pass'
+        )
+
+    def setUp(self):
+        for name in os.listdir(MAIL_DIR):
+            os.remove(os.path.join(MAIL_DIR, name))
+
+    def test_password_reset_is_queued_then_sent(self):
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'leo@example.com'}
+        )
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.recipients, 'leo@example.com')
+        self.assertFalse(os.listdir(MAIL_DIR))
+        self.assertEqual(Task.objects.filter(status=Task.PENDING).count(), 1)
+        run_pending()
+        self.assertEqual(
+            OutgoingEmail.objects.get().status, OutgoingEmail.SENT
+        )
+        self.assertEqual(len(os.listdir(MAIL_DIR)), 1)
+
+    def test_batch_uses_one_connection(self):
+        mail.send_mass_mail([
+            ('Тема', 'Текст', 'from@example.com', [f'u{i}@example.com'])
+            for i in range(3)
+        ])
+        self.assertEqual(
+            Task.objects.filter(status=Task.PENDING).count(), 1
+        )
+        self.assertEqual(send_batch(), 3)
+        # файловый транспорт пишет всё, что отправлено за одно
+        # соединение, в один файл
+        self.assertEqual(len(os.listdir(MAIL_DIR)), 1)
+
+    @override_settings(
+        EMAIL_TRANSPORT_BACKEND='core.tests.test_mail.BrokenBackend'
+    )
+    def test_retry_then_dead_letter(self):
+        mail.send_mail('Тема', 'Текст', 'from@example.com', ['a@b.ru'])
+        self.assertEqual(send_batch(), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertIn('Сервер недоступен', email.last_error)
+        with self.assertLogs('core.mail', 'ERROR'):
+            send_batch()
+        self.assertEqual(OutgoingEmail.objects.get().status,
+                         OutgoingEmail.DEAD)
+
+    @override_settings(
+        EMAIL_TRANSPORT_BACKEND='core.tests.test_mail.ConcurrentFlushBackend'
+    )
+    def test_concurrent_flush_sends_once(self):
+        ConcurrentFlushBackend.sent.clear()
+        ConcurrentFlushBackend.nested.clear()
+        mail.send_mass_mail([
+            ('Тема', 'Текст', 'from@example.com', [f'u{i}@example.com'])
+            for i in range(3)
+        ])
+        self.assertEqual(send_batch(), 3)
+        self.assertEqual(ConcurrentFlushBackend.nested, [0])
+        self.assertEqual(len(ConcurrentFlushBackend.sent), 3)
+
+    @override_settings(
+        EMAIL_TRANSPORT_BACKEND='core.tests.test_mail.ConcurrentFlushBackend'
+    )
+    def test_message_fields_round_trip(self):
+        ConcurrentFlushBackend.sent.clear()
+        ConcurrentFlushBackend.nested[:] = [0]
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@example.com', ['to@example.com'],
+            cc=['cc@example.com'], headers={'X-Tag': 'test'},
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.send()
+        send_batch()
+        sent, = ConcurrentFlushBackend.sent
+        self.assertEqual(sent.recipients(), message.recipients())
+        self.assertEqual(sent.extra_headers, {'X-Tag': 'test'})
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
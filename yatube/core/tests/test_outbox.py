@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from ..models import OutboxEvent
+from ..outbox import Consumer
+
+User = get_user_model()
+
+
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        OutboxEvent.objects.all().delete()
+
+    def test_views_write_events(self):
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:post_create'), {'text': 'Новый пост'})
+        post = Post.objects.get()
+        client.post(
+            reverse('posts:add_comment', args=(post.pk,)), {'text': 'Да'}
+        )
+        client.post(reverse('posts:profile_follow', args=('author',)))
+        events = Consumer('test').fetch(0)
+        self.assertEqual(
+            [(event.topic, event.object_id) for event in events],
+            [
+                ('post.created', post.pk),
+                ('comment.created', Comment.objects.get().pk),
+            ]
+        )
+        self.assertEqual(events[0].data['author_id'], self.user.pk)
+
+    def test_event_rolled_back_with_write(self):
+        try:
+            with transaction.atomic():
+                Post.objects.create(author=self.user, text='Откат')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_consumer_batches_and_checkpoints(self):
+        for number in range(5):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        consumer = Consumer('counter', topics=['post.created'], batch_size=2)
+        batches = []
+        self.assertEqual(consumer.run(batches.append), 5)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(consumer.run(batches.append), 0)
+
+        def fail(events):
+            raise RuntimeError
+        Post.objects.create(author=self.user, text='Ещё')
+        position = consumer.position()
+        with self.assertRaises(RuntimeError):
+            consumer.process(fail)
+        self.assertEqual(consumer.position(), position)
+        consumer.seek(0)
+        self.assertEqual(consumer.run(batches.append), 6)
+
+    def test_command_shows_lag(self):
+        Post.objects.create(author=self.user, text='Пост')
+        Consumer('idle').seek(0)
+        out = StringIO()
+        call_command('outbox', stdout=out)
+        self.assertIn('idle: 0, отставание 1', out.getvalue())
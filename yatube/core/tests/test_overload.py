@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+FULL = {
+    'max_concurrency': 0,
+    'max_queue': 0,
+    'queue_timeout': 0,
+    'slow_threshold': 1.0,
+}
+
+
+class LoadSheddingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_stale_rendering_served_when_queue_full(self):
+        url = reverse('posts:index')
+        fresh = self.guest_client.get(url)
+        with override_settings(OVERLOAD_PROTECTION={
+            'feeds': dict(FULL, views=['posts:index']),
+        }):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response.content, fresh.content)
+
+    def test_write_rejected_with_retry_after_when_queue_full(self):
+        with override_settings(OVERLOAD_PROTECTION={
+            'writes': dict(FULL, views=['posts:add_comment']),
+        }):
+            response = self.authorized_client.post(
+                reverse('posts:add_comment', args=(self.post.id,)),
+                {'text': 'Комментарий'}
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertFalse(self.post.comments.exists())
+
+    def test_limits_exported_as_metrics(self):
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertContains(
+            response, 'overload_max_concurrency{view_class="feeds"} 8'
+        )
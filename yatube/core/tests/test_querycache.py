@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Follow, Group, Post
+
+from ..versions import bump_table, get_table_versions, versions_cache
+
+User = get_user_model()
+
+
+class QueryCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeated_lookup_served_from_cache(self):
+        Group.cached.get(slug='group')
+        Post.cached.filter(author=self.user).count()
+        with self.assertNumQueries(0):
+            self.assertEqual(Group.cached.get(slug='group'), self.group)
+            self.assertEqual(Post.cached.filter(author=self.user).count(), 1)
+
+    def test_save_invalidates_cached_results(self):
+        self.assertEqual(Group.cached.get(slug='group').title, 'Группа')
+        self.group.title = 'Новая группа'
+        self.group.save()
+        self.assertEqual(Group.cached.get(slug='group').title, 'Новая группа')
+
+    def test_bulk_update_invalidates_cached_results(self):
+        self.assertEqual(Post.cached.filter(text='Новый текст').count(), 0)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.assertEqual(Post.cached.filter(text='Новый текст').count(), 1)
+
+    def test_follow_existence_cached_until_change(self):
+        reader = User.objects.create_user(username='reader')
+        follows = Follow.cached.filter(user=reader, author=self.user)
+        self.assertFalse(follows.exists())
+        Follow.objects.create(user=reader, author=self.user)
+        self.assertTrue(
+            Follow.cached.filter(user=reader, author=self.user).exists()
+        )
+
+    def test_every_bump_gives_new_version(self):
+        seen = {get_table_versions('posts_post')[0]}
+        for _ in range(20):
+            bump_table('posts_post')
+            seen.add(get_table_versions('posts_post')[0])
+        self.assertEqual(len(seen), 21)
+
+    def test_lost_version_replaced_with_new_one(self):
+        Group.cached.get(slug='group')
+        before = get_table_versions('posts_group')
+        versions_cache().clear()
+        after = get_table_versions('posts_group')
+        self.assertNotEqual(after, before)
+        self.assertEqual(get_table_versions('posts_group'), after)
+        Group.objects.filter(pk=self.group.pk).update(title='Новая')
+        versions_cache().clear()
+        self.assertEqual(Group.cached.get(slug='group').title, 'Новая')
@@ -0,0 +1,49 @@
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts.models import Post
+
+from .. import routers
+from ..middleware import ReadYourWritesMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.reset()
+        self.router = routers.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        routers.reset()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_reads_after_write_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_sets_pin_cookie(self):
+        def view(request):
+            self.router.db_for_write(Post)
+            return HttpResponse()
+
+        response = ReadYourWritesMiddleware(view)(self.factory.post('/'))
+        self.assertIn('primary_pin', response.cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = ReadYourWritesMiddleware(view)
+        middleware(self.factory.get('/'))
+        request = self.factory.get('/')
+        request.COOKIES['primary_pin'] = str(time.time() + 10)
+        middleware(request)
+        self.assertEqual(seen, ['replica', 'default'])
@@ -0,0 +1,44 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from ..slow_queries import SlowQueryLog, fingerprint, normalize_sql, read_log
+
+TEMP_LOG = os.path.join(tempfile.mkdtemp(), 'slow_queries.log')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_LOG_FILE=TEMP_LOG)
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        SlowQueryLog.explained.clear()
+        if os.path.exists(TEMP_LOG):
+            os.remove(TEMP_LOG)
+
+    def test_fingerprint_ignores_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a'"),
+            fingerprint("SELECT * FROM t WHERE id = 25 AND name = 'b'"),
+        )
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)'
+        )
+
+    def test_queries_logged_with_view_and_plan(self):
+        Client().get('/')
+        entries = list(read_log(TEMP_LOG))
+        self.assertTrue(entries)
+        views = {entry['view'] for entry in entries}
+        self.assertIn('posts:index', views)
+        self.assertTrue(any(entry.get('plan') for entry in entries))
+
+    def test_command_reports_top_fingerprints(self):
+        Client().get('/')
+        out = StringIO()
+        call_command('slow_queries', top=3, stdout=out)
+        self.assertIn('всего', out.getvalue())
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.querycache import VersionedQuerySet
+from posts.models import Follow
+
+from ..sqlite import retry_on_locked
+
+
+class SQLiteProfileTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    @override_settings(WRITE_RETRY_ATTEMPTS=3, WRITE_RETRY_BACKOFF=0)
+    def test_write_retried_when_database_locked(self):
+        calls = []
+
+        @retry_on_locked
+        def write(value):
+            calls.append(value)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return value
+
+        self.assertEqual(write('saved'), 'saved')
+        self.assertEqual(len(calls), 3)
+
+    @override_settings(WRITE_RETRY_ATTEMPTS=2, WRITE_RETRY_BACKOFF=0)
+    def test_other_errors_not_retried(self):
+        calls = []
+
+        @retry_on_locked
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(WRITE_RETRY_ATTEMPTS=2, WRITE_RETRY_BACKOFF=0)
+    def test_follow_by_get_retried(self):
+        User = get_user_model()
+        reader = User.objects.create_user(username='reader')
+        User.objects.create_user(username='author')
+        client = Client()
+        client.force_login(reader)
+        get_or_create = VersionedQuerySet.get_or_create
+        calls = []
+
+        def flaky(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return get_or_create(queryset, **kwargs)
+
+        with mock.patch.object(VersionedQuerySet, 'get_or_create', flaky):
+            client.get(reverse('posts:profile_follow', args=('author',)))
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(Follow.objects.filter(user=reader).exists())
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from .. import changelog
+from ..sse import Hub, handle_client
+
+
+class ChangelogTests(SimpleTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'changes.log')
+
+    def test_read_after_offset(self):
+        changelog.append(['index'], {'post': 1}, self.path)
+        offset = changelog.size(self.path)
+        changelog.append(['index'], {'post': 2}, self.path)
+        with open(self.path, 'a') as log:
+            log.write('{"topics": ["index"], "data"')
+        events = changelog.read(offset, self.path)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][1]['data'], {'post': 2})
+
+    def test_ids_survive_rotation(self):
+        changelog.append(['index'], {'post': 1}, self.path)
+        changelog.append(['index'], {'post': 2}, self.path)
+        first = changelog.read(0, self.path)[0][0]
+        changelog.rotate(self.path)
+        changelog.append(['index'], {'post': 3}, self.path)
+        events = changelog.read(first, self.path)
+        self.assertEqual(
+            [event['data']['post'] for _, event in events], [2, 3]
+        )
+        ids = [event_id for event_id, _ in changelog.read(0, self.path)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(ids[-1], changelog.end(self.path))
+        changelog.rotate(self.path)
+        changelog.append(['index'], {'post': 4}, self.path)
+        events = changelog.read(first, self.path)
+        self.assertEqual(
+            [event['data']['post'] for _, event in events], [3, 4]
+        )
+
+
+class HubTests(SimpleTestCase):
+    def test_fan_out_by_topic(self):
+        async def scenario():
+            hub = Hub(queue_size=1)
+            index = hub.subscribe(['index'])
+            group = hub.subscribe(['group:1'])
+            hub.publish(10, {'topics': ['index'], 'data': {'post': 1}})
+            self.assertEqual(index.queue.get_nowait(), (10, {'post': 1}))
+            self.assertTrue(group.queue.empty())
+            hub.publish(20, {'topics': ['index'], 'data': {'post': 2}})
+            hub.publish(30, {'topics': ['index'], 'data': {'post': 3}})
+            self.assertTrue(index.overflowed)
+            self.assertNotIn(index, hub.subscribers)
+        asyncio.run(scenario())
+
+    def test_stream_over_http(self):
+        path = os.path.join(tempfile.mkdtemp(), 'changes.log')
+
+        async def scenario():
+            hub = Hub()
+            tailer = asyncio.create_task(hub.tail(path, 0.01, max_size=1))
+            server = await asyncio.start_server(
+                lambda reader, writer: handle_client(
+                    hub, reader, writer, path, heartbeat=0.05
+                ),
+                '127.0.0.1', 0
+            )
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /events/?topic=group%3A1 HTTP/1.1\r\n\r\n')
+            await writer.drain()
+            self.assertIn(b'200 OK', await reader.readline())
+            while await reader.readline() != b'\r\n':
+                pass
+            while not hub.subscribers:
+                await asyncio.sleep(0.01)
+            changelog.append(['index'], {'post': 1}, path)
+            changelog.append(['index', 'group:1'], {'post': 2}, path)
+            event = await asyncio.wait_for(reader.readuntil(b'\n\n'), 5)
+            while not os.path.exists(path + '.1'):
+                await asyncio.sleep(0.01)
+            changelog.append(['group:1'], {'post': 3}, path)
+            rotated = await asyncio.wait_for(reader.readuntil(b'\n\n'), 5)
+            writer.close()
+            while hub.subscribers:
+                await asyncio.sleep(0.01)
+            tailer.cancel()
+            server.close()
+            await server.wait_closed()
+            return event, rotated
+        event, rotated = asyncio.run(scenario())
+        self.assertIn(b'event: post', event)
+        self.assertIn(b'data: {"post": 2}', event)
+        self.assertIn(b'data: {"post": 3}', rotated)
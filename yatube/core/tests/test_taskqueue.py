@@ -0,0 +1,147 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from .. import taskqueue
+from ..taskqueue import (Worker, claim, collect_metrics, enqueue, execute,
+                         prune_finished, run_pending, task)
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('Ошибка')
+
+
+@override_settings(TASK_RETRY_BACKOFF=0)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_priority_order(self):
+        record.delay('низкий', priority=-1)
+        record.delay('обычный')
+        record.delay('срочный', priority=5)
+        self.assertEqual(run_pending(), 3)
+        self.assertEqual(calls, ['срочный', 'обычный', 'низкий'])
+        self.assertEqual(
+            set(Task.objects.values_list('status', flat=True)), {Task.DONE}
+        )
+
+    def test_dedup_key(self):
+        first = record.delay(1, dedup_key='same')
+        second = record.delay(2, dedup_key='same')
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        record.delay(3, dedup_key='same')
+        run_pending()
+        self.assertEqual(calls, [1, 3])
+
+    def test_retry_with_backoff_then_fail(self):
+        explode.delay()
+        with self.assertLogs('core.taskqueue', 'WARNING'):
+            execute(claim('test'))
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.status, Task.PENDING)
+        self.assertEqual(task_row.attempts, 1)
+        self.assertIn('RuntimeError', task_row.last_error)
+        with self.assertLogs('core.taskqueue', 'WARNING'):
+            run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_delayed_task_waits(self):
+        enqueue('tests.record', ['позже'], countdown=60)
+        self.assertIsNone(claim('test'))
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNotNone(claim('test'))
+
+    def test_prune_finished(self):
+        old_task = record.delay('old')
+        new_task = record.delay('new')
+        failed_task = explode.delay()
+        waiting_task = enqueue('tests.record', ['later'], countdown=60)
+        with self.assertLogs('core.taskqueue', 'WARNING'):
+            run_pending()
+        Task.objects.filter(pk__in=[old_task.pk, failed_task.pk]).update(
+            finished=timezone.now() - timedelta(days=30)
+        )
+        self.assertEqual(prune_finished(), 2)
+        self.assertQuerysetEqual(
+            Task.objects.order_by('pk'), [new_task.pk, waiting_task.pk],
+            transform=lambda row: row.pk
+        )
+
+    def test_metrics_come_from_task_rows(self):
+        record.delay(1)
+        explode.delay()
+        with self.assertLogs('core.taskqueue', 'WARNING'):
+            run_pending()
+        samples = {
+            (name, tuple(sorted(labels.items()))): value
+            for name, labels, value in collect_metrics()
+        }
+        done = (('status', Task.DONE), ('task', 'tests.record'))
+        self.assertEqual(samples['tasks_finished_recent', done], 1)
+        failed = (('status', Task.FAILED), ('task', 'tests.explode'))
+        self.assertEqual(samples['tasks_finished_recent', failed], 1)
+        self.assertEqual(samples[
+            'task_queue_latency_seconds_count', (('task', 'tests.record'),)
+        ], 1)
+
+
+@override_settings(TASK_RETRY_BACKOFF=0)
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_burst(self):
+        for number in range(3):
+            record.delay(number)
+        Worker(threads=1, poll_interval=0, burst=True).run()
+        self.assertEqual(sorted(calls), [0, 1, 2])
+
+    def test_worker_survives_database_errors(self):
+        record.delay('после сбоя')
+        real_claim = taskqueue.claim
+        failures = [OperationalError('database is locked')]
+
+        def flaky_claim(worker):
+            if failures:
+                raise failures.pop()
+            return real_claim(worker)
+
+        with mock.patch.object(taskqueue, 'claim', flaky_claim):
+            with self.assertLogs('core.taskqueue', 'ERROR'):
+                Worker(threads=1, poll_interval=0, burst=True).run()
+        self.assertEqual(calls, ['после сбоя'])
+
+    @override_settings(TASK_TIMEOUT=1)
+    def test_worker_requeues_stale_tasks_while_running(self):
+        worker = Worker(threads=1, poll_interval=0.05)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        try:
+            task_row = record.delay('брошенная')
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.RUNNING, attempts=1,
+                started=timezone.now() - timedelta(seconds=5)
+            )
+            deadline = time.monotonic() + 5
+            while not calls and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            worker.stopping.set()
+            thread.join()
+        self.assertEqual(calls, ['брошенная'])
@@ -0,0 +1,67 @@
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# Таблицы, версии которых меняются при каждой записи через ORM.
+tracked_tables = set()
+
+
+def versions_cache():
+    return caches[settings.TABLE_VERSIONS_CACHE_ALIAS]
+
+
+def version_key(table):
+    return f'table_version:{table}'
+
+
+def get_table_versions(*tables):
+    """Текущие номера версий таблиц; меняются при каждой записи в таблицу.
+
+    Потерянная версия (кеш очистили) заменяется новой случайной,
+    а не постоянной по умолчанию: иначе снова отдавались бы записи,
+    сохранённые когда-то под этой постоянной версией.
+    """
+    keys = [version_key(table) for table in tables]
+    stored = versions_cache().get_many(keys)
+    for key in keys:
+        if key not in stored:
+            version = secrets.token_hex(8)
+            if not versions_cache().add(key, version, None):
+                version = versions_cache().get(key, version)
+            stored[key] = version
+    return tuple(stored[key] for key in keys)
+
+
+def get_versions(*models):
+    return get_table_versions(*(model._meta.db_table for model in models))
+
+
+def bump_table(table):
+    """Записывает новую случайную версию. Счётчик через incr
+    в FileBasedCache — это get и set без блокировки, и два
+    одновременных увеличения могут дать одно и то же число;
+    у случайных версий каждая запись гарантированно новая."""
+    versions_cache().set(version_key(table), secrets.token_hex(8), None)
+
+
+def bump(model):
+    """Меняет версию таблицы модели сразу и ещё раз после коммита,
+    чтобы не закешировались данные, прочитанные до коммита."""
+    table = model._meta.db_table
+    bump_table(table)
+    transaction.on_commit(lambda: bump_table(table))
+
+
+def bump_model_version(sender, **kwargs):
+    """Обработчик post_save / post_delete."""
+    bump(sender)
+
+
+def track(model):
+    """Менять версию таблицы модели при сохранении и удалении объектов."""
+    tracked_tables.add(model._meta.db_table)
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
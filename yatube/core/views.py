@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics as core_metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +16,11 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def metrics(request):
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise PermissionDenied
+    return HttpResponse(
+        core_metrics.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,15 +1,22 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .tags import sync_tags
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    # Ищет по колонке text: у сжатых длинных постов там только
+    # отрывок, полный текст лежит в сжатом body и поиску недоступен.
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        sync_tags(form.instance)
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description',)
@@ -1,5 +1,45 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from core import outbox
+        from core.versions import track
+
+        from . import events, holes, spam, tasks, watermarks  # noqa: F401
+        from .mentions import resolve_mentions
+        from .richtext import render_html
+        from .catalogue import invalidate
+        from .models import Comment, Follow, Group, Post
+        for model in self.get_models():
+            track(model)
+        track(get_user_model())
+        post_save.connect(invalidate, sender=Group)
+        post_delete.connect(invalidate, sender=Group)
+        post_save.connect(watermarks.post_created, sender=Post)
+        post_delete.connect(watermarks.post_deleted, sender=Post)
+        post_save.connect(watermarks.follow_changed, sender=Follow)
+        post_delete.connect(watermarks.follow_changed, sender=Follow)
+        post_save.connect(events.post_published, sender=Post)
+        outbox.track(Post, 'post', ('author_id', 'group_id'))
+        outbox.track(Comment, 'comment', ('post_id', 'author_id'))
+        outbox.track(Follow, 'follow', ('user_id', 'author_id'))
+        post_save.connect(tasks.image_changed, sender=Post)
+        post_save.connect(tasks.schedule_notifications, sender=Post)
+        post_save.connect(tasks.schedule_notifications, sender=Comment)
+        for model in (Post, Comment, Follow):
+            post_save.connect(tasks.schedule_trending, sender=model)
+        post_delete.connect(tasks.schedule_trending, sender=Follow)
+        post_save.connect(tasks.schedule_related, sender=Post)
+        post_save.connect(spam.post_saved, sender=Post)
+        post_save.connect(spam.comment_saved, sender=Comment)
+        post_delete.connect(spam.post_deleted, sender=Post)
+        post_delete.connect(spam.comment_deleted, sender=Comment)
+        for model in (Post, Comment):
+            pre_save.connect(resolve_mentions, sender=model)
+            pre_save.connect(render_html, sender=model)
+            post_save.connect(tasks.schedule_compaction, sender=model)
@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Count
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.versions import get_versions
+
+from .models import Comment, Group, Post, User
+
+CARD_FIELDS = (
+    'id', 'text', 'pub_date', 'author_username', 'author_name',
+    'group_slug', 'group_title', 'thumbnail_url', 'comment_count',
+    'text_html',
+)
+# Версия раскладки кортежа карточки: входит в ключ кеша и должна
+# увеличиваться при любом изменении CARD_FIELDS, иначе после деплоя
+# из кеша прочитаются кортежи старой раскладки.
+CARD_SCHEMA = 3
+# Миниатюра карточки; её заранее строит задача posts.make_thumbnails.
+CARD_THUMBNAIL = ('960x339', {'upscale': True})
+
+
+class PostCard:
+    """Компактная запись ленты: всё, что нужно для карточки поста.
+
+    В кеше хранится как кортеж простых значений (см. to_tuple),
+    а не как pickle экземпляра модели с _state и связанными объектами.
+    """
+
+    __slots__ = CARD_FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(CARD_FIELDS, values):
+            setattr(self, field, value)
+
+    def to_tuple(self):
+        values = [getattr(self, field) for field in CARD_FIELDS]
+        values[2] = values[2].timestamp()
+        return tuple(values)
+
+    @classmethod
+    def from_tuple(cls, values):
+        values = list(values)
+        values[2] = datetime.fromtimestamp(values[2], timezone.utc)
+        return cls(*values)
+
+
+def thumbnail_url(image):
+    """Адрес готовой миниатюры из хранилища ключей sorl; пустая строка,
+    если картинки нет или задача make_thumbnails её ещё не построила.
+    Имя миниатюры считается так же, как в get_thumbnail, но сама она
+    здесь не строится: запрос ленты не ждёт обработки картинок."""
+    if not image:
+        return ''
+    backend = default.backend
+    geometry, options = CARD_THUMBNAIL
+    options = dict(options)
+    try:
+        source = ImageFile(image)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', backend._get_format(source))
+        for key, value in backend.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in backend.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(thumbnail_defaults, attr):
+                options.setdefault(key, value)
+        name = backend._get_thumbnail_filename(source, geometry, options)
+        stored = default.kvstore.get(ImageFile(name, default.storage))
+    except Exception:
+        return ''
+    return stored.url if stored else ''
+
+
+def card_rows(queryset):
+    """Поля карточек и число комментариев одним запросом."""
+    return queryset.annotate(comment_count=Count('comments')).values_list(
+        'id', 'text', 'pub_date', 'author__username', 'author__first_name',
+        'author__last_name', 'group__slug', 'group__title', 'image',
+        'comment_count', 'text_html',
+    )
+
+
+def make_card(row):
+    (pk, text, pub_date, username, first_name, last_name,
+     group_slug, group_title, image, comment_count, text_html) = row
+    return PostCard(
+        pk, text, pub_date, username, f'{first_name} {last_name}'.strip(),
+        group_slug, group_title, thumbnail_url(image), comment_count,
+        text_html,
+    )
+
+
+def build_cards(queryset):
+    return [make_card(row) for row in card_rows(queryset)]
+
+
+class CountedList:
+    """Заглушка для Paginator: знает только число объектов."""
+
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+
+def get_card_page(request, queryset, name, models=()):
+    """Страница ленты из карточек; кешируется вместе с числом постов
+    до изменения постов, групп, комментариев, пользователей
+    или дополнительных моделей models."""
+    number = request.GET.get('page') or 1
+    versions = '.'.join(
+        str(version)
+        for version in get_versions(Post, Group, Comment, User, *models)
+    )
+    key = f'cards:{CARD_SCHEMA}:{name}:{number}:{versions}'
+
+    def compute():
+        page = Paginator(
+            card_rows(queryset), settings.PER_PAGE
+        ).get_page(number)
+        return (
+            page.paginator.count,
+            page.number,
+            [make_card(row).to_tuple() for row in page.object_list],
+        )
+
+    count, number, rows = cache.get_or_set(
+        key, compute, settings.CARDS_CACHE_TIMEOUT
+    )
+    paginator = Paginator(CountedList(count), settings.PER_PAGE)
+    return Page(
+        [PostCard.from_tuple(row) for row in rows], number, paginator
+    )
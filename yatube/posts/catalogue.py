@@ -0,0 +1,100 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404
+
+from core.versions import get_versions
+
+from .models import Group
+
+_lock = threading.Lock()
+_state = {
+    'version': None,
+    'checked': 0.0,
+    'groups': [],
+    'by_pk': {},
+    'by_slug': {},
+    'prefixes': [],
+}
+
+
+def invalidate(sender=None, **kwargs):
+    """Сбрасывает каталог процесса; подключён к сигналам Group."""
+    with _lock:
+        _state['version'] = None
+
+
+def _load():
+    version = get_versions(Group)[0]
+    groups = list(Group.objects.order_by('title'))
+    prefixes = sorted(
+        (group.title.lower(), index) for index, group in enumerate(groups)
+    )
+    with _lock:
+        _state.update(
+            version=version,
+            checked=time.monotonic(),
+            groups=groups,
+            by_pk={group.pk: group for group in groups},
+            by_slug={group.slug: group for group in groups},
+            prefixes=prefixes,
+        )
+
+
+def _ensure_loaded():
+    """Каталог групп в памяти процесса.
+
+    Версию таблицы в общем кеше сверяем не чаще раза
+    в GROUP_CATALOGUE_CHECK_INTERVAL секунд, так что изменения
+    из других процессов видны с такой задержкой.
+    """
+    now = time.monotonic()
+    interval = settings.GROUP_CATALOGUE_CHECK_INTERVAL
+    with _lock:
+        version = _state['version']
+        fresh = version is not None and now - _state['checked'] < interval
+    if fresh:
+        return
+    if version is not None and get_versions(Group)[0] == version:
+        with _lock:
+            _state['checked'] = now
+        return
+    _load()
+
+
+def get_groups():
+    _ensure_loaded()
+    return _state['groups']
+
+
+def get_group(pk):
+    _ensure_loaded()
+    return _state['by_pk'].get(pk)
+
+
+def get_group_or_404(slug):
+    _ensure_loaded()
+    group = _state['by_slug'].get(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def search(prefix, limit=10):
+    """Группы, название которых начинается с prefix."""
+    _ensure_loaded()
+    prefix = prefix.lower()
+    prefixes = _state['prefixes']
+    groups = _state['groups']
+    found = []
+    position = bisect_left(prefixes, (prefix, -1))
+    while (
+        position < len(prefixes)
+        and len(found) < limit
+        and prefixes[position][0].startswith(prefix)
+    ):
+        found.append(groups[prefixes[position][1]])
+        position += 1
+    return found
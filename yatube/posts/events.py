@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.db import transaction
+
+from core import changelog
+
+
+def post_topics(post):
+    """Ленты, в которых появляется пост: главная, группа и автор
+    (лента подписок складывается из тем её авторов)."""
+    topics = ['index', f'author:{post.author_id}']
+    if post.group_id:
+        topics.append(f'group:{post.group_id}')
+    return topics
+
+
+def post_published(sender, instance, created, **kwargs):
+    """Пишет событие о новом посте в журнал после коммита."""
+    if not created:
+        return
+    transaction.on_commit(partial(
+        changelog.append,
+        post_topics(instance),
+        {
+            'post': instance.pk,
+            'author': instance.author_id,
+            'group': instance.group_id,
+        }
+    ))
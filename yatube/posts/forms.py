@@ -1,6 +1,82 @@
 from django import forms
+from django.conf import settings
+from django.forms.models import ModelChoiceIterator
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Comment, Post
+from . import catalogue
+from .models import Comment, Group, Post, TextSignature
+from .spam import is_spam
+from .tags import sync_tags
+
+SPAM_MESSAGE = 'Похожий текст недавно публиковали слишком много раз'
+
+
+class GroupChoiceIterator(ModelChoiceIterator):
+    """Варианты групп из каталога в памяти процесса, без запроса к БД."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in catalogue.get_groups():
+            yield self.choice(group)
+
+    def __len__(self):
+        empty = 1 if self.field.empty_label is not None else 0
+        return len(catalogue.get_groups()) + empty
+
+    def __bool__(self):
+        return True
+
+
+class GroupAutocompleteWidget(forms.Widget):
+    """Поле выбора группы с подсказками по началу названия
+    для больших каталогов, где <select> со всеми группами слишком тяжёл."""
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        try:
+            group = catalogue.get_group(int(value))
+        except (TypeError, ValueError):
+            group = None
+        input_id = attrs.get('id', f'id_{name}')
+        return format_html(
+            '<input type="hidden" name="{name}" id="{id}" value="{value}">'
+            '<input type="text" class="{css}" id="{id}_title" '
+            'list="{id}_options" value="{title}" autocomplete="off" '
+            'data-url="{url}">'
+            '<datalist id="{id}_options"></datalist>'
+            '<script>(function () {{'
+            'var title = document.getElementById("{id}_title");'
+            'var hidden = document.getElementById("{id}");'
+            'var options = document.getElementById("{id}_options");'
+            'var found = {{}};'
+            'title.addEventListener("input", function () {{'
+            'hidden.value = found[title.value] || "";'
+            'var query = encodeURIComponent(title.value);'
+            'fetch(title.dataset.url + "?q=" + query)'
+            '.then(function (response) {{ return response.json(); }})'
+            '.then(function (data) {{'
+            'options.innerHTML = ""; found = {{}};'
+            'data.results.forEach(function (group) {{'
+            'found[group.title] = group.id;'
+            'var option = document.createElement("option");'
+            'option.value = group.title; options.appendChild(option);'
+            '}});'
+            'hidden.value = found[title.value] || "";'
+            '}});'
+            '}});'
+            '}})();</script>',
+            name=name,
+            id=input_id,
+            value=group.pk if group else '',
+            title=group.title if group else '',
+            css=attrs.get('class', ''),
+            url=reverse('posts:group_autocomplete'),
+        )
+
+    def value_from_datadict(self, data, files, name):
+        return data.get(name)
 
 
 class PostForm(forms.ModelForm):
@@ -16,8 +92,35 @@ class PostForm(forms.ModelForm):
             'group': ('Выберите группу поста'),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        group = self.fields['group']
+        group.iterator = GroupChoiceIterator
+        group.queryset = Group.cached.all()
+        if len(catalogue.get_groups()) > settings.GROUP_SELECT_LIMIT:
+            group.widget = GroupAutocompleteWidget()
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        exclude = None
+        if self.instance.pk:
+            exclude = (TextSignature.POST, self.instance.pk)
+        if is_spam(text, exclude=exclude):
+            raise forms.ValidationError(SPAM_MESSAGE)
+        return text
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        sync_tags(self.instance)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = {'text'}
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if is_spam(text):
+            raise forms.ValidationError(SPAM_MESSAGE)
+        return text
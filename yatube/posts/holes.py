@@ -0,0 +1,39 @@
+from django.template.loader import render_to_string
+
+from core.holes import register_hole
+
+from .models import Follow
+from .suggestions import suggestions_for
+
+
+@register_hole('switcher')
+def switcher(request):
+    return render_to_string(
+        'posts/includes/switcher.html', request=request
+    )
+
+
+@register_hole('follow_button')
+def follow_button(request, username):
+    user = request.user
+    if not user.is_authenticated or user.username == username:
+        return ''
+    following = Follow.cached.filter(
+        user=user, author__username=username
+    ).exists()
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'username': username, 'following': following},
+        request=request
+    )
+
+
+@register_hole('suggestions')
+def suggestions(request):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'posts/includes/suggestions.html',
+        {'suggestions': suggestions_for(request.user)},
+        request=request
+    )
@@ -0,0 +1,85 @@
+import pickle
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.cards import PostCard, build_cards
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер и скорость десериализации ленты из экземпляров '
+        'Post и из компактных карточек PostCard'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=2000)
+        parser.add_argument(
+            '--from-db', action='store_true',
+            help='Взять последние посты из БД вместо синтетических'
+        )
+
+    def synthetic_posts(self, count):
+        now = timezone.now()
+        return [
+            Post(
+                id=index,
+                text=f'Пост {index}. ' + 'Текст поста ' * 20,
+                pub_date=now,
+                image='posts/1.png',
+                author=User(
+                    id=index % 7, username=f'user{index % 7}',
+                    first_name='Лев', last_name='Толстой'
+                ),
+                group=Group(
+                    id=1, title='Группа', slug='group',
+                    description='Описание группы'
+                ),
+            )
+            for index in range(count)
+        ]
+
+    def synthetic_cards(self, posts):
+        return [
+            PostCard(
+                post.id, post.text, post.pub_date, post.author.username,
+                post.author.get_full_name(), post.group.slug,
+                post.group.title, '/media/cache/1.jpg', 0, post.text_html,
+            )
+            for post in posts
+        ]
+
+    def handle(self, *args, **options):
+        if options['from_db']:
+            queryset = Post.objects.all()[:options['posts']]
+            posts = list(queryset.select_related('author', 'group'))
+            cards = build_cards(Post.objects.filter(
+                pk__in=[post.pk for post in posts]
+            ))
+        else:
+            posts = self.synthetic_posts(options['posts'])
+            cards = self.synthetic_cards(posts)
+        variants = {
+            'Post': pickle.dumps(posts, pickle.HIGHEST_PROTOCOL),
+            'PostCard': pickle.dumps(
+                [card.to_tuple() for card in cards], pickle.HIGHEST_PROTOCOL
+            ),
+        }
+        loaders = {
+            'Post': lambda data: pickle.loads(data),
+            'PostCard': lambda data: [
+                PostCard.from_tuple(row) for row in pickle.loads(data)
+            ],
+        }
+        repeat = options['repeat']
+        for name, data in variants.items():
+            seconds = timeit.timeit(
+                lambda: loaders[name](data), number=repeat
+            )
+            self.stdout.write(
+                f'{name:>8}: {len(posts)} постов, {len(data)} байт, '
+                f'загрузка {seconds / repeat * 1e6:.1f} мкс'
+            )
@@ -0,0 +1,123 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.fields import compress, decompress
+from posts.models import Post
+from posts.text import excerpt
+
+WORDS = (
+    'пост лента группа автор текст запись день город дорога лес река '
+    'утро вечер друг работа книга музыка фото зима лето снег дождь '
+    'первый новый старый большой короткий длинный быстро медленно'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер SQLite и время чтения ленты и поста '
+        'для несжатых текстов и для сжатых длинных текстов с отрывком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument(
+            '--long-share', type=float, default=0.05,
+            help='Доля длинных текстов среди синтетических'
+        )
+        parser.add_argument('--long-length', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=500)
+        parser.add_argument(
+            '--from-db', action='store_true',
+            help='Взять тексты постов из БД вместо синтетических'
+        )
+
+    def synthetic_texts(self, options):
+        generator = random.Random(0)
+        texts = []
+        for _ in range(options['rows']):
+            length = (
+                options['long_length']
+                if generator.random() < options['long_share'] else 300
+            )
+            words = []
+            while sum(len(word) + 1 for word in words) < length:
+                words.append(generator.choice(WORDS))
+            texts.append(' '.join(words))
+        return texts
+
+    def handle(self, *args, **options):
+        if options['from_db']:
+            texts = [
+                body or text
+                for text, body in Post.objects.values_list('text', 'body')
+            ]
+        else:
+            texts = self.synthetic_texts(options)
+        directory = tempfile.mkdtemp()
+        try:
+            for name, compressed in (('plain', False), ('compressed', True)):
+                path = os.path.join(directory, f'{name}.sqlite3')
+                self.prepare(path, texts, compressed)
+                feed, detail = self.measure(path, len(texts), options)
+                self.stdout.write(
+                    f'{name:>10}: {len(texts)} текстов, '
+                    f'{os.path.getsize(path) / 1024:.0f} КБ, '
+                    f'страница ленты {feed * 1e6:.0f} мкс, '
+                    f'пост {detail * 1e6:.0f} мкс'
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def prepare(self, path, texts, compressed):
+        threshold = settings.TEXT_COMPRESS_THRESHOLD
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, body BLOB)'
+        )
+        rows = []
+        for text in texts:
+            if compressed and len(text) > threshold:
+                rows.append((
+                    excerpt(text, settings.TEXT_EXCERPT_LENGTH),
+                    compress(text)
+                ))
+            else:
+                rows.append((text, None))
+        connection.executemany(
+            'INSERT INTO post (text, body) VALUES (?, ?)', rows
+        )
+        connection.commit()
+        connection.execute('VACUUM')
+        connection.close()
+
+    def measure(self, path, count, options):
+        """Среднее время страницы ленты из отрывков и одного поста
+        с распаковкой полного текста."""
+        connection = sqlite3.connect(path)
+        generator = random.Random(1)
+        repeat = options['repeat']
+        start = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(
+                'SELECT id, text FROM post ORDER BY id DESC LIMIT ? OFFSET ?',
+                (settings.PER_PAGE, generator.randrange(count))
+            ).fetchall()
+        feed = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            text, body = connection.execute(
+                'SELECT text, body FROM post WHERE id = ?',
+                (generator.randrange(count) + 1,)
+            ).fetchone()
+            if body is not None:
+                decompress(body)
+        detail = (time.perf_counter() - start) / repeat
+        connection.close()
+        return feed, detail
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.related import rebuild, update
+
+
+class Command(BaseCommand):
+    help = 'Строит индекс похожих постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Только учесть новые и изменённые посты'
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        if options['incremental']:
+            self.stdout.write(f'Обработано событий: {update()}')
+        else:
+            self.stdout.write(f'Проиндексировано постов: {rebuild()}')
+        self.stdout.write(f'{time.monotonic() - start:.1f} с')
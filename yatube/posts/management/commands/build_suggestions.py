@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import build
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «на кого подписаться»'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=settings.SUGGESTIONS_PER_USER,
+            help='Рекомендаций на пользователя'
+        )
+        parser.add_argument(
+            '--fanout', type=int, default=settings.SUGGESTION_MAX_FANOUT,
+            help='Сколько соседей вершины просматривать'
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        users, total = build(options['limit'], options['fanout'])
+        self.stdout.write(
+            f'Пользователей в графе: {users}, рекомендаций: {total}, '
+            f'{time.monotonic() - start:.1f} с'
+        )
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.richtext import compact
+
+
+class Command(BaseCommand):
+    help = (
+        'Сжимает тексты постов и комментариев длиннее '
+        'TEXT_COMPRESS_THRESHOLD, записанные несжатыми'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.TEXT_COMPACT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            total = compact(model, options['batch'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {total}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.tags import reindex
+
+
+class Command(BaseCommand):
+    help = 'Заново извлекает теги из текстов всех постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = reindex(options['batch'])
+        self.stdout.write(f'Проиндексировано постов: {total}')
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.richtext import RENDERER_VERSION, rerender
+from posts.tasks import render_texts
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает готовый HTML постов и комментариев, '
+            'построенный прежней версией правил отображения')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.RENDER_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все записи, а не только устаревшие'
+        )
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Поставить пересчёт в очередь фоновых задач'
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            render_texts.delay(options['all'], dedup_key='render_texts')
+            self.stdout.write('Пересчёт поставлен в очередь')
+            return
+        for model in (Post, Comment):
+            total = rerender(model, options['batch'], force=options['all'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {total} '
+                f'(версия {RENDERER_VERSION})'
+            )
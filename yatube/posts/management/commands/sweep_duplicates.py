@@ -0,0 +1,80 @@
+import os
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from posts.models import Comment, Post, TextSignature
+from posts.spam import clusters, signatures_for
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает SimHash всех постов и комментариев в нескольких '
+        'процессах и выводит группы почти одинаковых текстов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument('--chunk', type=int, default=1000)
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько самых больших групп показать'
+        )
+
+    def rows(self):
+        for pk, text, body, created in Post.objects.values_list(
+            'pk', 'text', 'body', 'pub_date'
+        ).iterator():
+            yield TextSignature.POST, pk, body or text, created
+        for pk, text, body, created in Comment.objects.values_list(
+            'pk', 'text', 'body', 'created'
+        ).iterator():
+            yield TextSignature.COMMENT, pk, body or text, created
+
+    def handle(self, *args, **options):
+        chunks = list(chunked(self.rows(), options['chunk']))
+        if options['workers'] > 1:
+            # Дочерние процессы только считают и не должны
+            # наследовать соединения с базой.
+            connections.close_all()
+            with Pool(options['workers']) as pool:
+                results = pool.map(signatures_for, chunks)
+        else:
+            results = [signatures_for(chunk) for chunk in chunks]
+        signatures = []
+        with transaction.atomic():
+            TextSignature.objects.all().delete()
+            for result in results:
+                TextSignature.objects.bulk_create([
+                    TextSignature(
+                        kind=kind, object_id=object_id, created=created,
+                        **fields
+                    )
+                    for kind, object_id, created, fields in result
+                ])
+                signatures.extend(
+                    ((kind, object_id), fields['simhash'])
+                    for kind, object_id, _, fields in result
+                )
+        groups = sorted(clusters(signatures), key=len, reverse=True)
+        self.stdout.write(
+            f'Текстов: {len(signatures)}, групп похожих: {len(groups)}'
+        )
+        for group in groups[:options['top']]:
+            self.stdout.write(f'  {len(group)}: ' + ', '.join(
+                f'{kind} {object_id}' for kind, object_id in group[:10]
+            ))
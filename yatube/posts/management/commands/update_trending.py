@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rebuild, update
+
+
+class Command(BaseCommand):
+    help = 'Обновляет ленту «Популярное» по новым событиям'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать заново по постам, комментариям и подпискам'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.stdout.write(f'Пересчитано постов: {rebuild()}')
+        else:
+            self.stdout.write(f'Обработано событий: {update()}')
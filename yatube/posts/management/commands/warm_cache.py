@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm, warmup_urls
+
+
+class Command(BaseCommand):
+    help = 'Прогревает кеш популярными страницами лент и постов'
+
+    def add_arguments(self, parser):
+        options = settings.CACHE_WARMUP
+        parser.add_argument(
+            '--pages', type=int, default=options['pages'],
+            help='Сколько первых страниц каждой ленты прогреть'
+        )
+        parser.add_argument('--groups', type=int, default=options['groups'])
+        parser.add_argument(
+            '--profiles', type=int, default=options['profiles']
+        )
+        parser.add_argument('--posts', type=int, default=options['posts'])
+        parser.add_argument(
+            '--workers', type=int, default=options['workers']
+        )
+        parser.add_argument(
+            '--rate', type=float, default=options['rate'],
+            help='Не больше запросов в секунду; 0 — без ограничения'
+        )
+
+    def handle(self, *args, **options):
+        urls = warmup_urls(
+            options['pages'], options['groups'],
+            options['profiles'], options['posts'],
+        )
+        results = warm(urls, options['workers'], options['rate'])
+        failed = [url for url, status in results if status != 200]
+        self.stdout.write(
+            f'Прогрето страниц: {len(results) - len(failed)} '
+            f'из {len(results)}'
+        )
+        for url in failed:
+            self.stdout.write(self.style.WARNING(f'  не удалось: {url}'))
@@ -0,0 +1,44 @@
+import json
+
+from django.contrib.auth import get_user_model
+
+from .text import mentions
+
+User = get_user_model()
+
+
+def resolve_many(texts):
+    """Упоминания для каждого текста с id пользователей; имена из всех
+    текстов ищутся одним запросом, неизвестные пропускаются."""
+    found = [mentions(text) for text in texts]
+    names = {name for items in found for _, _, name in items}
+    users = dict(User.objects.filter(
+        username__in=names
+    ).values_list('username', 'pk')) if names else {}
+    return [
+        [
+            [start, end, users[name], name]
+            for start, end, name in items if name in users
+        ]
+        for items in found
+    ]
+
+
+def dumps(spans):
+    return json.dumps(spans) if spans else ''
+
+
+def resolve_mentions(sender, instance, raw=False, **kwargs):
+    """pre_save: сохраняет упоминания вместе с текстом; у записи
+    без загруженного полного текста остаются прежние."""
+    if raw or not instance.has_full_text():
+        return
+    instance.mentions = dumps(resolve_many([instance.text])[0])
+
+
+def spans(stored):
+    return json.loads(stored) if stored else []
+
+
+def mentioned_ids(stored):
+    return {user_id for _, _, user_id, _ in spans(stored)}
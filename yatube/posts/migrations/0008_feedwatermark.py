@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    """До unique_follow повторные подписки были возможны: оставляем
+    по одной, иначе ограничение не создастся на живых данных."""
+    Follow = apps.get_model('posts', 'Follow')
+    keep = Follow.objects.order_by().values('user', 'author').annotate(
+        keep=models.Min('pk')
+    ).values_list('keep', flat=True)
+    Follow.objects.exclude(pk__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0007_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_watermark', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_seen_post_id', models.PositiveIntegerField(default=0)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupScore',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group')),
+                ('score', models.FloatField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post')),
+                ('heat', models.FloatField()),
+                ('score', models.FloatField(db_index=True)),
+                ('comments', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_related'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextSignature',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('simhash', models.BigIntegerField()),
+                ('band0', models.IntegerField(db_index=True)),
+                ('band1', models.IntegerField(db_index=True)),
+                ('band2', models.IntegerField(db_index=True)),
+                ('band3', models.IntegerField(db_index=True)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='textsignature',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_signature'),
+        ),
+    ]
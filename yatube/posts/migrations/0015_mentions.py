@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='mentions',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='mentions',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('post', 'Новые записи автора'), ('comment', 'Новые комментарии к записи'), ('mention', 'Упоминания в записи и комментариях к ней')], max_length=10),
+        ),
+    ]
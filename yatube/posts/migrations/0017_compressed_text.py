@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:14
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='body',
+            field=core.fields.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='body_html',
+            field=core.fields.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='body',
+            field=core.fields.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='body_html',
+            field=core.fields.CompressedTextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_compressed_text'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='followsuggestion',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
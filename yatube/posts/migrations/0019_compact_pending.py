@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Length
+
+
+def mark_pending(apps, schema_editor):
+    """Единственный полный просмотр текстов: дальше флаг ставит save."""
+    for name in ('Post', 'Comment'):
+        apps.get_model('posts', name).objects.filter(
+            body__isnull=True
+        ).annotate(length=Length('text')).filter(
+            length__gt=settings.TEXT_COMPRESS_THRESHOLD
+        ).update(compact_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_followsuggestion_general'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='compact_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='compact_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(compact_pending=True), fields=['compact_pending'], name='comment_compact_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(compact_pending=True), fields=['compact_pending'], name='post_compact_idx'),
+        ),
+        migrations.RunPython(mark_pending, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,63 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models import UniqueConstraint
+from django.utils import timezone
+
+from core.fields import CompressedTextField
+from core.querycache import CachingQuerySet, VersionedQuerySet
 
 User = get_user_model()
 
 
+class CompressedTextMixin:
+    """Длинный текст хранится сжатым в body и body_html, а в text
+    и text_html остаётся отрывок. При загрузке с body модель получает
+    полный текст; запрос с defer('body', 'body_html') читает только
+    отрывок, не передавая и не распаковывая тело."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if instance.__dict__.get('body') is not None:
+            instance.text = instance.body
+            instance.text_html = instance.__dict__.get('body_html') or ''
+        return instance
+
+    def has_full_text(self):
+        """False у записи, загруженной с defer('body', 'body_html'):
+        в text у неё может быть отрывок, и пересчитывать по нему
+        упоминания, отпечатки и сжатие нельзя."""
+        return 'body' not in self.get_deferred_fields()
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
 
+    objects = VersionedQuerySet.as_manager()
+    cached = CachingQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class Post(CompressedTextMixin, models.Model):
     text = models.TextField(help_text='Введите текст поста')
+    # Упоминания из текста в JSON: [[начало, конец, id, username], ...].
+    mentions = models.TextField(blank=True, default='', editable=False)
+    # Готовый HTML текста и версия правил, по которым он построен.
+    text_html = models.TextField(blank=True, default='', editable=False)
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
+    body = CompressedTextField(blank=True, null=True)
+    body_html = CompressedTextField(blank=True, null=True)
+    # Длинный текст записан несжатым и ждёт задачи compact_texts.
+    compact_pending = models.BooleanField(default=False, editable=False)
+    # Растёт при каждом save: фоновый пересчёт не затирает правку,
+    # сделанную после того, как он прочитал строку.
+    revision = models.PositiveIntegerField(default=0, editable=False)
     pub_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
         User,
@@ -37,14 +79,44 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = VersionedQuerySet.as_manager()
+    cached = CachingQuerySet.as_manager()
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['compact_pending'],
+                condition=models.Q(compact_pending=True),
+                name='post_compact_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Загруженные значения: по ним post_save решает, что изменилось.
+        instance._loaded = {
+            name: str(instance.__dict__[name])
+            for name in ('text', 'image') if name in instance.__dict__
+        }
+        return instance
+
+    def changed(self, name):
+        """Изменилось ли поле text или image после загрузки из базы;
+        у поста, созданного в коде, изменённым считается всё."""
+        loaded = getattr(self, '_loaded', None)
+        if loaded is None:
+            return True
+        if name not in loaded:
+            return name in self.__dict__
+        return str(self.__dict__[name]) != loaded[name]
+
 
-class Comment(models.Model):
+class Comment(CompressedTextMixin, models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -54,10 +126,32 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments')
     text = models.TextField(help_text='Введите текст коментария')
+    mentions = models.TextField(blank=True, default='', editable=False)
+    text_html = models.TextField(blank=True, default='', editable=False)
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
+    body = CompressedTextField(blank=True, null=True)
+    body_html = CompressedTextField(blank=True, null=True)
+    # Длинный текст записан несжатым и ждёт задачи compact_texts.
+    compact_pending = models.BooleanField(default=False, editable=False)
+    # Растёт при каждом save: фоновый пересчёт не затирает правку,
+    # сделанную после того, как он прочитал строку.
+    revision = models.PositiveIntegerField(default=0, editable=False)
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = VersionedQuerySet.as_manager()
+    cached = CachingQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['compact_pending'],
+                condition=models.Q(compact_pending=True),
+                name='comment_compact_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -75,7 +169,216 @@ class Follow(models.Model):
         related_name='following'
     )
 
+    objects = VersionedQuerySet.as_manager()
+    cached = CachingQuerySet.as_manager()
+
     class Meta:
         constraints = [
             UniqueConstraint(fields=['user', 'author'], name='unique_follow')
         ]
+
+
+class FeedWatermark(models.Model):
+    """Отметка прочитанного в ленте подписок: id последнего
+    просмотренного поста и счётчик новых постов после него."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_watermark'
+    )
+    last_seen_post_id = models.PositiveIntegerField(default=0)
+    unread = models.PositiveIntegerField(default=0)
+
+
+class Notification(models.Model):
+    """Уведомление во входящих. Повторяющиеся непрочитанные события
+    с одним coalesce_key не множат строки, а увеличивают count."""
+    POST = 'post'
+    COMMENT = 'comment'
+    MENTION = 'mention'
+    KINDS = (
+        (POST, 'Новые записи автора'),
+        (COMMENT, 'Новые комментарии к записи'),
+        (MENTION, 'Упоминания в записи и комментариях к ней'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    coalesce_key = models.CharField(max_length=100)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    updated = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-updated', '-id']
+        indexes = [
+            models.Index(
+                fields=['user', '-updated', '-id'],
+                name='notification_inbox_idx'
+            ),
+        ]
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'coalesce_key'],
+                condition=models.Q(is_read=False),
+                name='unique_unread_notification'
+            ),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендация «на кого подписаться»; пересчитывается
+    командой build_suggestions. Строки без user — общие подсказки."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        blank=True,
+        null=True
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['user', 'rank'], name='suggestion_user_idx'),
+        ]
+
+
+class PostScore(models.Model):
+    """Место поста в ленте «Популярное» (см. posts.trending)."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending'
+    )
+    heat = models.FloatField()
+    score = models.FloatField(db_index=True)
+    comments = models.PositiveIntegerField(default=0)
+
+
+class GroupScore(models.Model):
+    """Место группы среди популярных групп (см. posts.trending)."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending'
+    )
+    score = models.FloatField(db_index=True)
+
+
+class TextPosting(models.Model):
+    """Запись обратного индекса текстов постов: хешированный признак
+    (слово) и его нормированный вес в посте (см. posts.related)."""
+    feature = models.IntegerField(db_index=True)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    weight = models.FloatField()
+
+
+class RelatedPost(models.Model):
+    """Похожий пост; rank 1 — самый похожий."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['post', 'rank'], name='related_post_idx'),
+        ]
+
+
+class TextSignature(models.Model):
+    """SimHash текста поста или комментария, разбитый на полосы
+    для поиска почти одинаковых текстов (см. posts.spam)."""
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveIntegerField()
+    simhash = models.BigIntegerField()
+    band0 = models.IntegerField(db_index=True)
+    band1 = models.IntegerField(db_index=True)
+    band2 = models.IntegerField(db_index=True)
+    band3 = models.IntegerField(db_index=True)
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_signature'
+            ),
+        ]
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Пост с тегом; дата публикации повторена здесь, чтобы лента
+    тега читалась по одному индексу (tag, pub_date)."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post'], name='tag_feed_idx'
+            ),
+        ]
+        constraints = [
+            UniqueConstraint(fields=['tag', 'post'], name='unique_post_tag'),
+        ]
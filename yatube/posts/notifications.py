@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.db.models import F
+
+from core.outbox import Consumer
+from core.pagination import cursor_page
+
+from .mentions import mentioned_ids
+from .models import Comment, Follow, Notification, Post
+
+TOPICS = ['post.created', 'comment.created']
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def notify(kind, key, actor_id, post_id, user_ids, when):
+    """Уведомляет пользователей: у кого уже есть непрочитанное
+    уведомление с тем же ключом, увеличиваем счётчик одним UPDATE,
+    остальным добавляем строки пачками."""
+    size = settings.NOTIFICATION_BATCH_SIZE
+    for chunk in chunks(list(user_ids), size):
+        unread = Notification.objects.filter(
+            user_id__in=chunk, coalesce_key=key, is_read=False
+        )
+        coalesced = set(unread.values_list('user_id', flat=True))
+        if coalesced:
+            unread.filter(user_id__in=coalesced).update(
+                count=F('count') + 1, actor_id=actor_id,
+                post_id=post_id, updated=when
+            )
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id, kind=kind, coalesce_key=key,
+                actor_id=actor_id, post_id=post_id, updated=when
+            )
+            for user_id in chunk if user_id not in coalesced
+        ], batch_size=size)
+
+
+def mark_read(user, notification_ids):
+    """Отмечает прочитанными показанные пользователю уведомления."""
+    return Notification.objects.filter(
+        user=user, pk__in=notification_ids, is_read=False
+    ).update(is_read=True)
+
+
+def mentioned(stored, actor_id, post_id, when):
+    """Уведомляет упомянутых в записи или комментарии, кроме автора."""
+    user_ids = mentioned_ids(stored) - {actor_id}
+    if user_ids:
+        notify(
+            Notification.MENTION, f'mention:{post_id}', actor_id,
+            post_id, user_ids, when
+        )
+
+
+def fan_out(events):
+    """Обработчик пачки событий ленты core.outbox."""
+    post_ids = {
+        event.object_id if event.topic == 'post.created'
+        else event.data['post_id']
+        for event in events
+    }
+    posts = {
+        pk: (author_id, mentions)
+        for pk, author_id, mentions in Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('pk', 'author_id', 'mentions')
+    }
+    comments = dict(Comment.objects.filter(pk__in=[
+        event.object_id for event in events
+        if event.topic == 'comment.created'
+    ]).values_list('pk', 'mentions'))
+    for event in events:
+        if event.topic == 'post.created':
+            post_created(event, posts)
+        else:
+            comment_created(event, posts, comments)
+
+
+def post_created(event, posts):
+    if event.object_id not in posts:
+        return
+    author_id, mentions = posts[event.object_id]
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    notify(
+        Notification.POST, f'post:{author_id}', author_id,
+        event.object_id, followers, event.created
+    )
+    mentioned(mentions, author_id, event.object_id, event.created)
+
+
+def comment_created(event, posts, comments):
+    post_id = event.data['post_id']
+    commenter = event.data['author_id']
+    if post_id not in posts:
+        return
+    post_author = posts[post_id][0]
+    if post_author != commenter:
+        notify(
+            Notification.COMMENT, f'comment:{post_id}', commenter,
+            post_id, [post_author], event.created
+        )
+    mentioned(
+        comments.get(event.object_id), commenter, post_id, event.created
+    )
+
+
+def deliver():
+    """Разбирает накопившиеся события; выполняется фоновой задачей."""
+    return Consumer(
+        'notifications', topics=TOPICS,
+        batch_size=settings.NOTIFICATION_BATCH_SIZE
+    ).run(fan_out)
+
+
+def inbox(user, cursor=None, limit=None):
+    """Страница входящих после курсора: (уведомления, следующий курсор)."""
+    notifications = Notification.objects.filter(user=user).select_related(
+        'actor', 'post'
+    )
+    return cursor_page(
+        notifications, cursor,
+        limit or settings.NOTIFICATIONS_PER_PAGE, 'updated'
+    )
@@ -0,0 +1,196 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from core.outbox import Consumer, head
+
+from .models import Post, RelatedPost, TextPosting
+from .text import feature, words
+
+TOPICS = ['post.created', 'post.updated']
+
+
+def vectorize(text):
+    """Хешированный вектор текста: признак -> 1 + log(tf),
+    нормированный на длину вектора."""
+    bits = settings.RELATED_FEATURE_BITS
+    counts = Counter(feature(word, bits) for word in words(text))
+    weights = {
+        index: 1 + math.log(count) for index, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {index: weight / norm for index, weight in weights.items()}
+
+
+def idf(df, total):
+    return math.log((1 + total) / (1 + df)) + 1
+
+
+def max_df(total):
+    """Признаки, встречающиеся чаще, считаем служебными словами:
+    они почти ничего не говорят о схожести, а списки у них длинные."""
+    return max(2, settings.RELATED_MAX_DF_RATIO * total)
+
+
+def nearest(vector, postings, df, total, exclude, limit):
+    """k ближайших по косинусу с весами TF-IDF: [(post_id, сходство)].
+
+    postings — признак -> [(post_id, вес)], df — признак -> число постов.
+    """
+    scores = defaultdict(float)
+    cutoff = max_df(total)
+    for index, weight in vector.items():
+        frequency = df.get(index, 0)
+        if not frequency or frequency > cutoff:
+            continue
+        weight *= idf(frequency, total) ** 2
+        for post_id, other in postings.get(index, ()):
+            if post_id != exclude:
+                scores[post_id] += weight * other
+    return heapq.nlargest(
+        limit, scores.items(), key=lambda item: (item[1], item[0])
+    )
+
+
+def related_rows(post_id, neighbours):
+    return [
+        RelatedPost(post_id=post_id, related_id=other, score=score, rank=rank)
+        for rank, (other, score) in enumerate(neighbours, 1)
+    ]
+
+
+def rebuild(batch_size=1000):
+    """Строит индекс и списки похожих постов заново в памяти;
+    возвращает число постов. Дальше индекс обновляется по событиям."""
+    limit = settings.RELATED_POSTS
+    # Позиция берётся до чтения постов: изменённые после этого посты
+    # переиндексируются по событиям ещё раз.
+    position = head()
+    vectors = {
+        pk: vectorize(body or text)
+        for pk, text, body in Post.objects.values_list(
+            'pk', 'text', 'body'
+        ).iterator(chunk_size=batch_size)
+    }
+    postings = defaultdict(list)
+    for pk, vector in vectors.items():
+        for index, weight in vector.items():
+            postings[index].append((pk, weight))
+    df = {index: len(items) for index, items in postings.items()}
+    total = len(vectors)
+    # Поиск соседей — самая долгая часть, он идёт до транзакции, чтобы
+    # не держать блокировку записи SQLite.
+    rows = []
+    for pk, vector in vectors.items():
+        rows.extend(related_rows(
+            pk, nearest(vector, postings, df, total, pk, limit)
+        ))
+    with transaction.atomic():
+        TextPosting.objects.all().delete()
+        RelatedPost.objects.all().delete()
+        TextPosting.objects.bulk_create((
+            TextPosting(feature=index, post_id=pk, weight=weight)
+            for index, items in postings.items()
+            for pk, weight in items
+        ), batch_size=batch_size)
+        RelatedPost.objects.bulk_create(rows, batch_size=batch_size)
+        consumer().seek(position)
+    return total
+
+
+def lookup(vector, total):
+    """Частоты и списки признаков вектора из индекса в базе:
+    два запроса на пост."""
+    df = dict(
+        TextPosting.objects.filter(feature__in=list(vector)).values(
+            'feature'
+        ).annotate(count=Count('id')).values_list('feature', 'count')
+    )
+    cutoff = max_df(total)
+    useful = [index for index, count in df.items() if count <= cutoff]
+    postings = defaultdict(list)
+    for index, post_id, weight in TextPosting.objects.filter(
+        feature__in=useful
+    ).values_list('feature', 'post_id', 'weight'):
+        postings[index].append((post_id, weight))
+    return postings, df
+
+
+def offer(post_id, neighbours):
+    """Добавляет пост в списки его соседей, если он туда проходит."""
+    limit = settings.RELATED_POSTS
+    offered = dict(neighbours)
+    lists = defaultdict(list)
+    for row in RelatedPost.objects.filter(post_id__in=list(offered)):
+        if row.related_id != post_id:
+            lists[row.post_id].append((row.related_id, row.score))
+    changed = []
+    for other, score in offered.items():
+        current = lists[other]
+        if len(current) >= limit and score <= min(s for _, s in current):
+            continue
+        current.append((post_id, score))
+        current.sort(key=lambda item: (item[1], item[0]), reverse=True)
+        changed.append((other, current[:limit]))
+    if not changed:
+        return
+    RelatedPost.objects.filter(
+        post_id__in=[other for other, _ in changed]
+    ).delete()
+    RelatedPost.objects.bulk_create([
+        row for other, items in changed for row in related_rows(other, items)
+    ])
+
+
+def process(events):
+    """Обработчик пачки событий core.outbox: переиндексирует новые
+    и изменённые посты и обновляет списки похожих."""
+    texts = {
+        pk: body or text
+        for pk, text, body in Post.objects.filter(
+            pk__in={event.object_id for event in events}
+        ).values_list('pk', 'text', 'body')
+    }
+    if not texts:
+        return
+    TextPosting.objects.filter(post_id__in=list(texts)).delete()
+    # Из списков прежних соседей пост убирается: с новым текстом он
+    # мог стать им непохож. Их списки дополнит следующий rebuild.
+    RelatedPost.objects.filter(related_id__in=list(texts)).delete()
+    vectors = {pk: vectorize(text) for pk, text in texts.items()}
+    TextPosting.objects.bulk_create([
+        TextPosting(feature=index, post_id=pk, weight=weight)
+        for pk, vector in vectors.items()
+        for index, weight in vector.items()
+    ])
+    total = Post.objects.count()
+    limit = settings.RELATED_POSTS
+    for pk, vector in vectors.items():
+        postings, df = lookup(vector, total)
+        neighbours = nearest(vector, postings, df, total, pk, limit)
+        RelatedPost.objects.filter(post_id=pk).delete()
+        RelatedPost.objects.bulk_create(related_rows(pk, neighbours))
+        offer(pk, neighbours)
+
+
+def consumer():
+    return Consumer(
+        'related', topics=TOPICS, batch_size=settings.RELATED_BATCH_SIZE
+    )
+
+
+def update():
+    return consumer().run(process)
+
+
+def related_posts(post):
+    """Похожие посты одним запросом по индексу."""
+    return [
+        row.related for row in RelatedPost.objects.filter(
+            post=post
+        ).select_related('related')
+    ]
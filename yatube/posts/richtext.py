@@ -0,0 +1,165 @@
+import re
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import escape, format_html
+
+from core.sqlite import retry_on_locked
+
+from .mentions import dumps, resolve_many, spans
+from .text import HASHTAG_RE, excerpt, tag_name
+
+# Версия правил отображения: при её изменении сохранённый HTML
+# пересчитывается командой render_texts.
+RENDERER_VERSION = 1
+
+URL_RE = re.compile(r'https?://[^\s<>"]*[^\s<>".,;:!?)\]\'»]')
+LINK_RE = re.compile(rf'(?P<url>{URL_RE.pattern})|{HASHTAG_RE.pattern}')
+NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+
+
+def link(href, label):
+    return format_html('<a href="{}">{}</a>', href, label)
+
+
+def plain(text):
+    """Кусок текста без упоминаний: экранирование, ссылки и теги."""
+    parts = []
+    position = 0
+    for match in LINK_RE.finditer(text):
+        if match.group('url'):
+            html = format_html(
+                '<a href="{0}" rel="nofollow">{0}</a>', match.group('url')
+            )
+        else:
+            name = tag_name(match.group(2))
+            if name is None:
+                continue
+            html = link(
+                reverse('posts:tag_feed', args=(name,)), match.group()
+            )
+        parts.append(escape(text[position:match.start()]))
+        parts.append(html)
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def render(text, mentions):
+    """HTML текста: всё экранировано, упоминания, теги и адреса
+    стали ссылками, переводы строк — <br>. Упоминание, не совпавшее
+    с текстом (текст меняли в обход save), выводится как есть."""
+    parts = []
+    position = 0
+    for start, end, _, username in spans(mentions):
+        if start < position or text[start:end] != '@' + username:
+            continue
+        parts.append(plain(text[position:start]))
+        parts.append(link(
+            reverse('posts:profile', args=(username,)), text[start:end]
+        ))
+        position = end
+    parts.append(plain(text[position:]))
+    return NEWLINE_RE.sub('<br>', ''.join(parts))
+
+
+def columns(text, mentions):
+    """Значения колонок текста. Короткий хранится как есть; у длинного
+    в text и text_html остаётся отрывок для лент, а полные текст
+    и HTML уходят в сжатые body и body_html."""
+    html = render(text, mentions)
+    if len(text) <= settings.TEXT_COMPRESS_THRESHOLD:
+        return {'text': text, 'text_html': html, 'body': None,
+                'body_html': None}
+    short = excerpt(text, settings.TEXT_EXCERPT_LENGTH)
+    return {'text': short, 'text_html': render(short, mentions),
+            'body': text, 'body_html': html}
+
+
+def render_html(sender, instance, raw=False, **kwargs):
+    """pre_save: HTML считается один раз при записи, а не при показе.
+    Подключается после resolve_mentions, упоминания уже найдены.
+    Полный текст записывается несжатым, его сожмёт задача
+    posts.compact_texts; если body не загружено, в text отрывок
+    и сжатое тело остаётся как есть."""
+    if raw:
+        return
+    instance.text_html = render(instance.text, instance.mentions)
+    instance.html_version = RENDERER_VERSION
+    instance.revision += 1
+    if instance.has_full_text():
+        instance.body = instance.body_html = None
+        instance.compact_pending = (
+            len(instance.text) > settings.TEXT_COMPRESS_THRESHOLD
+        )
+
+
+UPDATED_FIELDS = (
+    'mentions', 'text', 'text_html', 'body', 'body_html', 'html_version',
+    'compact_pending',
+)
+
+
+@retry_on_locked
+def save_rows(model, rows):
+    """Записывает строки, revision которых не изменился с чтения:
+    правку, сделанную за это время, старый текст не затирает, а HTML
+    для неё уже посчитал её собственный save. Возвращает их число."""
+    current = dict(model.objects.select_for_update().filter(
+        pk__in=[row.pk for row in rows]
+    ).values_list('pk', 'revision'))
+    fresh = [row for row in rows if current.get(row.pk) == row.revision]
+    if fresh:
+        model.objects.bulk_update(fresh, UPDATED_FIELDS)
+    return len(fresh)
+
+
+def update_rows(model, rows, found):
+    """Пересчитывает колонки текста строк и сохраняет их одним
+    bulk_update; found — упоминания для каждой строки."""
+    for row, mentions in zip(rows, found):
+        row.mentions = dumps(mentions)
+        for name, value in columns(row.text, row.mentions).items():
+            setattr(row, name, value)
+        row.html_version = RENDERER_VERSION
+        row.compact_pending = False
+    return save_rows(model, rows)
+
+
+def batches(queryset, batch_size):
+    """Строки по возрастанию pk пачками, с полным текстом."""
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by('pk').only(
+            'pk', 'text', 'mentions', 'body', 'revision'
+        )[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1].pk
+
+
+def rerender(model, batch_size=500, force=False):
+    """Пересчитывает упоминания и HTML записей модели, отрисованных
+    прежней версией, пачками по batch_size; возвращает их число."""
+    queryset = model.objects.all()
+    if not force:
+        queryset = queryset.filter(html_version__lt=RENDERER_VERSION)
+    total = 0
+    for rows in batches(queryset, batch_size):
+        total += update_rows(
+            model, rows, resolve_many([row.text for row in rows])
+        )
+    return total
+
+
+def compact(model, batch_size=200):
+    """Сжимает длинные тексты, записанные несжатыми (флаг ставит
+    render_html при сохранении); возвращает число сжатых записей."""
+    queryset = model.objects.filter(compact_pending=True)
+    total = 0
+    for rows in batches(queryset, batch_size):
+        total += update_rows(
+            model, rows, [spans(row.mentions) for row in rows]
+        )
+    return total
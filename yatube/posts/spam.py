@@ -0,0 +1,149 @@
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TextSignature
+from .text import shingles, simhash
+
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def to_signed(value):
+    """64-битный отпечаток в диапазоне BigIntegerField."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def bands(signature):
+    """Отпечаток, разрезанный на 4 полосы по 16 бит. Отпечатки,
+    отличающиеся не больше чем в трёх битах, совпадают хотя бы
+    в одной полосе, поэтому кандидатов ищем по индексам полос."""
+    return [
+        signature >> (band * BAND_BITS) & BAND_MASK for band in range(BANDS)
+    ]
+
+
+def distance(first, second):
+    return bin((first ^ second) & ((1 << 64) - 1)).count('1')
+
+
+def checkable(text):
+    """Короткие реплики вроде «Спасибо!» или «+1» законно повторяются
+    у разных людей: их отпечатки не сравниваются и не хранятся."""
+    return len(shingles(text)) >= settings.SPAM_MIN_SHINGLES
+
+
+def signature_fields(text):
+    signature = simhash(text)
+    fields = {'simhash': to_signed(signature)}
+    for band, value in enumerate(bands(signature)):
+        fields[f'band{band}'] = value
+    return signature, fields
+
+
+def near_duplicates(text, since=None, exclude=None):
+    """Почти одинаковые тексты: [(вид, id, число различающихся бит)]."""
+    if not checkable(text):
+        return []
+    signature, fields = signature_fields(text)
+    if not signature:
+        return []
+    candidates = TextSignature.objects.filter(reduce(or_, (
+        Q(**{f'band{band}': fields[f'band{band}']}) for band in range(BANDS)
+    ))).exclude(simhash=0)
+    if since is not None:
+        candidates = candidates.filter(created__gte=since)
+    if exclude is not None:
+        candidates = candidates.exclude(kind=exclude[0], object_id=exclude[1])
+    found = []
+    for kind, object_id, other in candidates.values_list(
+        'kind', 'object_id', 'simhash'
+    ):
+        bits = distance(signature, other)
+        if bits <= settings.SPAM_MAX_DISTANCE:
+            found.append((kind, object_id, bits))
+    return found
+
+
+def is_spam(text, exclude=None):
+    """Текст повторяет волну: за SPAM_WINDOW уже было не меньше
+    SPAM_DUPLICATE_LIMIT почти таких же постов и комментариев."""
+    since = timezone.now() - timedelta(seconds=settings.SPAM_WINDOW)
+    duplicates = near_duplicates(text, since=since, exclude=exclude)
+    return len(duplicates) >= settings.SPAM_DUPLICATE_LIMIT
+
+
+def record(kind, object_id, text):
+    if not checkable(text):
+        TextSignature.objects.filter(
+            kind=kind, object_id=object_id
+        ).delete()
+        return
+    _, fields = signature_fields(text)
+    TextSignature.objects.update_or_create(
+        kind=kind, object_id=object_id, defaults=fields
+    )
+
+
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw and instance.has_full_text():
+        record(TextSignature.POST, instance.pk, instance.text)
+
+
+def comment_saved(sender, instance, raw=False, **kwargs):
+    if not raw and instance.has_full_text():
+        record(TextSignature.COMMENT, instance.pk, instance.text)
+
+
+def post_deleted(sender, instance, **kwargs):
+    TextSignature.objects.filter(
+        kind=TextSignature.POST, object_id=instance.pk
+    ).delete()
+
+
+def comment_deleted(sender, instance, **kwargs):
+    TextSignature.objects.filter(
+        kind=TextSignature.COMMENT, object_id=instance.pk
+    ).delete()
+
+
+def signatures_for(rows):
+    """Отпечатки пачки (вид, id, текст, время); выполняется
+    в процессах пула, поэтому к базе не обращается."""
+    return [
+        (kind, object_id, created, signature_fields(text)[1])
+        for kind, object_id, text, created in rows if checkable(text)
+    ]
+
+
+def clusters(signatures):
+    """Группы почти одинаковых текстов среди [(ключ, отпечаток)]:
+    пары ищутся только внутри корзин полос, а не всех со всеми."""
+    parent = {key: key for key, _ in signatures}
+
+    def root(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    buckets = {}
+    for key, signature in signatures:
+        for band, value in enumerate(bands(signature)):
+            buckets.setdefault((band, value), []).append((key, signature))
+    for members in buckets.values():
+        for index, (key, signature) in enumerate(members):
+            for other, other_signature in members[index + 1:]:
+                if distance(signature, other_signature) <= (
+                    settings.SPAM_MAX_DISTANCE
+                ):
+                    parent[root(other)] = root(key)
+    groups = {}
+    for key, _ in signatures:
+        groups.setdefault(root(key), []).append(key)
+    return [group for group in groups.values() if len(group) > 1]
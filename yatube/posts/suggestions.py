@@ -0,0 +1,163 @@
+import heapq
+import math
+from array import array
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion
+
+# Вес автора, на которого подписаны те, на кого подписан пользователь.
+FRIEND_WEIGHT = 1.0
+
+
+class Adjacency:
+    """Разреженная матрица смежности в формате CSR: соседи строки i
+    лежат в indices[indptr[i]:indptr[i + 1]]. Строится подсчётом
+    за два прохода по рёбрам, без словаря списков на каждую вершину."""
+
+    def __init__(self, size, rows, columns):
+        counts = array('q', [0]) * (size + 1)
+        for row in rows:
+            counts[row + 1] += 1
+        for i in range(size):
+            counts[i + 1] += counts[i]
+        self.indptr = array('q', counts)
+        self.indices = array('q', [0]) * len(rows)
+        position = counts
+        for row, column in zip(rows, columns):
+            self.indices[position[row]] = column
+            position[row] += 1
+
+    def __getitem__(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def degree(self, row):
+        return self.indptr[row + 1] - self.indptr[row]
+
+
+class FollowGraph:
+    """Граф подписок: following[i] — на кого подписан i,
+    followers[i] — кто подписан на i. Вершины — плотные номера."""
+
+    def __init__(self, edges):
+        self.ids = array('q')
+        index = {}
+        users = array('q')
+        authors = array('q')
+        for user_id, author_id in edges:
+            for pk in (user_id, author_id):
+                if pk not in index:
+                    index[pk] = len(self.ids)
+                    self.ids.append(pk)
+            users.append(index[user_id])
+            authors.append(index[author_id])
+        self.index = index
+        self.following = Adjacency(len(self.ids), users, authors)
+        self.followers = Adjacency(len(self.ids), authors, users)
+
+    @classmethod
+    def from_db(cls, chunk_size=10000):
+        return cls(Follow.objects.values_list(
+            'user_id', 'author_id'
+        ).iterator(chunk_size=chunk_size))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def score_candidates(graph, node, fanout):
+    """Веса кандидатов для вершины node.
+
+    Друзья друзей получают FRIEND_WEIGHT за каждый путь; авторы,
+    на которых подписаны читатели тех же авторов, — вес, убывающий
+    с популярностью общего автора. Обход каждого списка ограничен
+    fanout соседями, поэтому «звёзды» не раздувают время счёта.
+    """
+    scores = {}
+    for friend in graph.following[node][:fanout]:
+        for candidate in graph.following[friend][:fanout]:
+            scores[candidate] = scores.get(candidate, 0) + FRIEND_WEIGHT
+        weight = 1 / math.log(2 + graph.followers.degree(friend))
+        for reader in graph.followers[friend][:fanout]:
+            if reader == node:
+                continue
+            for candidate in graph.following[reader][:fanout]:
+                scores[candidate] = scores.get(candidate, 0) + weight
+    return scores
+
+
+def suggest(graph, node, limit, fanout, fallback=()):
+    """Лучшие кандидаты для вершины node: (вершина, вес); если их
+    меньше limit, список дополняется вершинами из fallback."""
+    scores = score_candidates(graph, node, fanout)
+    excluded = set(graph.following[node])
+    excluded.add(node)
+    best = heapq.nlargest(
+        limit,
+        (item for item in scores.items() if item[0] not in excluded),
+        key=lambda item: (item[1], -item[0])
+    )
+    for candidate in fallback:
+        if len(best) >= limit:
+            break
+        if candidate not in excluded and candidate not in scores:
+            best.append((candidate, 0.0))
+    return best
+
+
+def popular(graph, limit):
+    """Самые читаемые авторы — подсказки для тех, у кого мало подписок."""
+    return heapq.nlargest(
+        limit, range(len(graph)), key=graph.followers.degree
+    )
+
+
+def build(limit=None, fanout=None, batch_size=1000):
+    """Пересчитывает рекомендации всех пользователей из графа подписок.
+    Возвращает (число вершин, число рекомендаций).
+
+    Счёт идёт вне транзакции, а готовые строки подменяют старые
+    одной короткой транзакцией: SQLite не держит блокировку записи
+    на всё время пересчёта.
+    """
+    limit = limit or settings.SUGGESTIONS_PER_USER
+    fanout = fanout or settings.SUGGESTION_MAX_FANOUT
+    graph = FollowGraph.from_db()
+    fallback = popular(graph, limit * 2)
+    ids = graph.ids
+    # Общие подсказки (user=None) для тех, кого нет в графе; на одну
+    # больше limit, чтобы хватило и самому популярному автору.
+    rows = [
+        FollowSuggestion(
+            user_id=None, author_id=ids[candidate], score=0.0, rank=rank
+        )
+        for rank, candidate in enumerate(fallback[:limit + 1], 1)
+    ]
+    for node in range(len(graph)):
+        best = suggest(graph, node, limit, fanout, fallback)
+        rows.extend(
+            FollowSuggestion(
+                user_id=ids[node], author_id=ids[candidate],
+                score=score, rank=rank
+            )
+            for rank, (candidate, score) in enumerate(best, 1)
+        )
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        FollowSuggestion.objects.bulk_create(rows, batch_size=batch_size)
+    return len(graph), len(rows)
+
+
+def suggestions_for(user, limit=None):
+    """Рекомендации пользователя одним запросом по индексу; у кого их
+    нет, тем показываются общие — самые читаемые авторы."""
+    limit = limit or settings.SUGGESTIONS_PER_USER
+    found = list(FollowSuggestion.objects.filter(user=user).select_related(
+        'author'
+    )[:limit])
+    if found:
+        return found
+    return list(FollowSuggestion.objects.filter(user=None).exclude(
+        author=user
+    ).select_related('author')[:limit])
@@ -0,0 +1,51 @@
+from django.db import transaction
+
+from .models import Post, PostTag, Tag
+from .text import hashtags
+
+
+def get_tags(names):
+    """Теги по именам; недостающие создаются одним запросом."""
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True
+        )
+        tags.update(
+            (tag.name, tag) for tag in Tag.objects.filter(name__in=missing)
+        )
+    return tags
+
+
+def index_posts(posts):
+    """Переписывает теги постов по их текстам пачкой запросов."""
+    names = {post.pk: hashtags(post.text) for post in posts}
+    tags = get_tags({name for found in names.values() for name in found})
+    with transaction.atomic():
+        PostTag.objects.filter(post__in=[post.pk for post in posts]).delete()
+        PostTag.objects.bulk_create([
+            PostTag(tag=tags[name], post_id=post.pk, pub_date=post.pub_date)
+            for post in posts
+            for name in names[post.pk]
+        ])
+
+
+def sync_tags(post):
+    """Теги одного поста после сохранения формы или админки."""
+    index_posts([post])
+
+
+def reindex(batch_size=1000):
+    """Теги всех постов заново, пачками по batch_size."""
+    total = 0
+    last_pk = 0
+    while True:
+        posts = list(Post.objects.filter(pk__gt=last_pk).order_by(
+            'pk'
+        ).only('pk', 'text', 'body', 'pub_date')[:batch_size])
+        if not posts:
+            return total
+        index_posts(posts)
+        total += len(posts)
+        last_pk = posts[-1].pk
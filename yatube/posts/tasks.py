@@ -0,0 +1,90 @@
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.taskqueue import task
+
+from . import notifications, related, richtext, trending
+from .cards import CARD_THUMBNAIL
+from .models import Comment, Post
+
+# Варианты миниатюр из шаблонов ленты, профиля и страницы поста.
+THUMBNAIL_VARIANTS = (
+    CARD_THUMBNAIL,
+    ('960x339', {'crop': 'center', 'upscale': True}),
+    ('960x339', {'padding': False}),
+)
+
+
+@task('posts.make_thumbnails', priority=-1)
+def make_thumbnails(post_id):
+    """Готовит миниатюры картинки поста заранее, чтобы
+    первый просмотр страницы не ждал их построения."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    for geometry, options in THUMBNAIL_VARIANTS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+def image_changed(sender, instance, raw=False, **kwargs):
+    """Ставит построение миниатюр в очередь в транзакции сохранения,
+    если картинку загрузили или заменили."""
+    if raw or not instance.image or not instance.changed('image'):
+        return
+    make_thumbnails.delay(
+        instance.pk, dedup_key=f'thumbnails:{instance.pk}'
+    )
+
+
+@task('posts.deliver_notifications', priority=1)
+def deliver_notifications():
+    notifications.deliver()
+
+
+def schedule_notifications(sender, instance, created, raw=False, **kwargs):
+    """Раздача уведомлений идёт в фоне, одна задача на все события."""
+    if created and not raw:
+        deliver_notifications.delay(dedup_key='notifications')
+
+
+@task('posts.update_trending')
+def update_trending():
+    trending.update()
+
+
+def schedule_trending(sender, instance, created=True, raw=False, **kwargs):
+    """Пересчёт популярного по новым событиям, одна задача на все."""
+    if created and not raw:
+        update_trending.delay(dedup_key='trending')
+
+
+@task('posts.update_related')
+def update_related():
+    related.update()
+
+
+def schedule_related(sender, instance, raw=False, **kwargs):
+    """Переиндексация похожих постов, если текст новый или изменён."""
+    if not raw and instance.changed('text'):
+        update_related.delay(dedup_key='related')
+
+
+@task('posts.compact_texts', priority=-1)
+def compact_texts():
+    for model in (Post, Comment):
+        richtext.compact(model, settings.TEXT_COMPACT_BATCH_SIZE)
+
+
+def schedule_compaction(sender, instance, raw=False, **kwargs):
+    """Длинный текст записан несжатым; сжатие идёт в фоне."""
+    if not raw and instance.compact_pending:
+        compact_texts.delay(dedup_key='compact_texts')
+
+
+@task('posts.render_texts', priority=-1)
+def render_texts(force=False):
+    """Пересчёт HTML текстов после смены версии правил отображения."""
+    for model in (Post, Comment):
+        richtext.rerender(
+            model, settings.RENDER_BATCH_SIZE, force=force
+        )
@@ -0,0 +1,11 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@register.filter
+def or_text(text_html, text):
+    """Готовый HTML текста; пока он не построен — экранированный текст."""
+    return mark_safe(text_html) if text_html else escape(text)
@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.taskqueue import run_pending
+
+from .. import cards
+from ..cards import PostCard, build_cards, get_card_page
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(settings.PER_PAGE)
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_card_fields(self):
+        card = build_cards(Post.objects.filter(pk=self.post.pk))[0]
+        self.assertEqual(card.author_name, 'Лев Толстой')
+        self.assertEqual(card.group_slug, 'group')
+        self.assertEqual(card.comment_count, 1)
+        restored = PostCard.from_tuple(card.to_tuple())
+        self.assertEqual(restored.pub_date, self.post.pub_date)
+        self.assertEqual(restored.text, self.post.text)
+
+    def test_card_page_cached(self):
+        request = self.factory.get('/', {'page': 2})
+        page = get_card_page(request, Post.objects.all(), 'index')
+        with self.assertNumQueries(0):
+            cached = get_card_page(request, Post.objects.all(), 'index')
+        self.assertEqual(page.number, 2)
+        self.assertEqual(cached.paginator.num_pages, 2)
+        self.assertEqual([card.id for card in cached], [self.post.pk])
+
+    def test_schema_change_skips_cached_cards(self):
+        request = self.factory.get('/')
+        get_card_page(request, Post.objects.all(), 'index')
+        with mock.patch.object(cards, 'CARD_SCHEMA', cards.CARD_SCHEMA + 1):
+            with self.assertNumQueries(2):
+                get_card_page(request, Post.objects.all(), 'index')
+
+    def test_thumbnail_only_from_prebuilt(self):
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        post = Post.objects.create(
+            author=self.user, text='С картинкой', image=SimpleUploadedFile(
+                'small.gif', small_gif, content_type='image/gif'
+            )
+        )
+        card = build_cards(Post.objects.filter(pk=post.pk))[0]
+        self.assertEqual(card.thumbnail_url, '')
+        run_pending()
+        card = build_cards(Post.objects.filter(pk=post.pk))[0]
+        self.assertTrue(card.thumbnail_url.startswith(settings.MEDIA_URL))
@@ -0,0 +1,56 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import catalogue
+from ..forms import GroupAutocompleteWidget, PostForm
+from ..models import Group
+
+
+class GroupCatalogueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Group.objects.bulk_create([
+            Group(title='Котики', slug='cats', description='Описание'),
+            Group(title='Кофе', slug='coffee', description='Описание'),
+            Group(title='Лыжи', slug='ski', description='Описание'),
+        ])
+
+    def setUp(self):
+        catalogue.invalidate()
+
+    def test_catalogue_served_from_memory(self):
+        catalogue.get_groups()
+        with self.assertNumQueries(0):
+            self.assertEqual(catalogue.get_group_or_404('ski').title, 'Лыжи')
+            self.assertEqual(len(PostForm().fields['group'].choices), 4)
+
+    def test_change_reloads_catalogue(self):
+        catalogue.get_groups()
+        Group.objects.create(title='Книги', slug='books', description='-')
+        self.assertEqual(catalogue.get_group_or_404('books').title, 'Книги')
+
+    def test_prefix_search(self):
+        titles = [group.title for group in catalogue.search('ко')]
+        self.assertEqual(titles, ['Котики', 'Кофе'])
+
+    def test_autocomplete_endpoint(self):
+        response = Client().get(
+            reverse('posts:group_autocomplete'), {'q': 'Лы'}
+        )
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': Group.objects.get(slug='ski').pk,
+              'title': 'Лыжи', 'slug': 'ski'}]
+        )
+
+    @override_settings(GROUP_SELECT_LIMIT=2)
+    def test_large_catalogue_uses_autocomplete(self):
+        form = PostForm()
+        self.assertIsInstance(
+            form.fields['group'].widget, GroupAutocompleteWidget
+        )
+        group = Group.objects.get(slug='cats')
+        form = PostForm({'text': 'Текст', 'group': group.pk})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], group)
@@ -0,0 +1,64 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.taskqueue import run_pending
+
+from ..models import Comment, Notification, Post
+from ..text import mentions
+
+User = get_user_model()
+
+
+class MentionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.leo = User.objects.create_user(username='leo')
+        cls.anna = User.objects.create_user(username='anna.k')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parse(self):
+        self.assertEqual(
+            [name for _, _, name in mentions(
+                '@leo, @anna.k. mail@leo.ru @@x http://a/@b @leo'
+            )],
+            ['leo', 'anna.k', 'leo']
+        )
+
+    def test_resolved_in_one_query_on_save(self):
+        with CaptureQueriesContext(connection) as queries:
+            post = Post.objects.create(
+                author=self.author, text='@leo и @anna.k, но не @nobody'
+            )
+        self.assertEqual(
+            sum('FROM "auth_user"' in query['sql'] for query in queries), 1
+        )
+        self.assertEqual(json.loads(post.mentions), [
+            [0, 4, self.leo.pk, 'leo'],
+            [7, 14, self.anna.pk, 'anna.k'],
+        ])
+        post.text = 'Без упоминаний'
+        post.save()
+        self.assertEqual(post.mentions, '')
+
+    def test_mentioned_users_notified(self):
+        post = Post.objects.create(
+            author=self.author, text='@leo @anna.k @author'
+        )
+        Comment.objects.create(post=post, author=self.leo, text='@anna.k!')
+        run_pending()
+        notifications = Notification.objects.filter(
+            kind=Notification.MENTION
+        )
+        self.assertEqual(
+            {(item.user, item.count) for item in notifications},
+            {(self.leo, 1), (self.anna, 2)}
+        )
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
+from core.models import Task
+
 from ..models import Group, Post
 
 User = get_user_model()
@@ -59,3 +61,18 @@ class PostModelTest(TestCase):
             with self.subTest(field=field, expected_value=expected_value):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+    def test_thumbnails_only_for_new_image(self):
+        thumbnails = Task.objects.filter(name='posts.make_thumbnails')
+        post = Post.objects.create(
+            author=self.user, text='С картинкой', image='posts/a.png'
+        )
+        self.assertEqual(thumbnails.count(), 1)
+        thumbnails.delete()
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        self.assertFalse(thumbnails.exists())
+        post.image = 'posts/b.png'
+        post.save()
+        self.assertEqual(thumbnails.count(), 1)
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.taskqueue import run_pending
+
+from ..models import Comment, Follow, Notification, Post
+from ..notifications import inbox
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATION_BATCH_SIZE=2)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+
+    def test_posts_fan_out_and_coalesce(self):
+        Post.objects.create(author=self.author, text='Первый')
+        run_pending()
+        self.assertEqual(Notification.objects.count(), 3)
+        Post.objects.create(author=self.author, text='Второй')
+        Post.objects.create(author=self.author, text='Третий')
+        run_pending()
+        self.assertEqual(
+            list(Notification.objects.values_list('count', flat=True)),
+            [3, 3, 3]
+        )
+
+    def test_comments_on_own_post(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.author, text='Сам')
+        for follower in self.followers[:2]:
+            Comment.objects.create(post=post, author=follower, text='Да')
+        run_pending()
+        notification = Notification.objects.get(user=self.author)
+        self.assertEqual(notification.kind, Notification.COMMENT)
+        self.assertEqual(notification.count, 2)
+        self.assertEqual(notification.actor, self.followers[1])
+
+    @override_settings(NOTIFICATIONS_PER_PAGE=1)
+    def test_cursor_paging_and_read(self):
+        reader = self.followers[0]
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.author, text='Ответ')
+        Comment.objects.create(post=post, author=reader, text='Вопрос')
+        run_pending()
+        client = Client()
+        client.force_login(reader)
+        response = client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['notifications']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+        notification = Notification.objects.get(user=reader)
+        self.assertFalse(notification.is_read)
+        self.assertEqual(response.context['unread'], [notification.pk])
+        other = Notification.objects.get(user=self.author)
+        response = client.post(reverse('posts:notifications_seen'), {
+            'notification_id': [notification.pk, other.pk]
+        })
+        self.assertEqual(response.json(), {'read': 1})
+        self.assertTrue(Notification.objects.get(user=reader).is_read)
+        self.assertFalse(Notification.objects.get(user=self.author).is_read)
+        Post.objects.create(author=self.author, text='Новый')
+        run_pending()
+        page, cursor = inbox(reader)
+        self.assertEqual([item.is_read for item in page], [False])
+        page, cursor = inbox(reader, cursor)
+        self.assertEqual([item.is_read for item in page], [True])
+        self.assertIsNone(cursor)
@@ -0,0 +1,118 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Task
+from core.taskqueue import run_pending
+
+from ..models import Post, RelatedPost
+from ..related import rebuild, related_posts, vectorize
+
+User = get_user_model()
+
+TEXTS = [
+    'Рецепт борща со свёклой и капустой',
+    'Борщ без капусты: рецепт со свёклой',
+    'Лыжный поход по зимнему лесу',
+    'Зимний поход на лыжах через лес',
+    'Обзор нового телефона',
+]
+
+
+@override_settings(RELATED_POSTS=2, RELATED_MAX_DF_RATIO=0.5)
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=text)
+            for text in TEXTS
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_vector_is_normalized(self):
+        vector = vectorize('слово слово другое')
+        self.assertAlmostEqual(
+            sum(weight * weight for weight in vector.values()), 1
+        )
+
+    def test_rebuild(self):
+        call_command('build_related', stdout=StringIO())
+        borsch, borsch_too, ski, ski_too, _ = self.posts
+        self.assertEqual(related_posts(borsch)[0], borsch_too)
+        self.assertEqual(related_posts(ski_too)[0], ski)
+        self.assertLessEqual(
+            RelatedPost.objects.filter(post=borsch).count(), 2
+        )
+
+    def test_incremental_update(self):
+        run_pending()
+        self.assertEqual(related_posts(self.posts[0])[0], self.posts[1])
+        new = Post.objects.create(
+            author=self.author, text='Обзор и тест нового телефона'
+        )
+        run_pending()
+        self.assertEqual(related_posts(new)[0], self.posts[4])
+        self.assertIn(new, related_posts(self.posts[4]))
+
+    def test_edited_post_leaves_old_neighbours(self):
+        run_pending()
+        borsch, borsch_too = self.posts[:2]
+        self.assertIn(borsch_too, related_posts(borsch))
+        post = Post.objects.get(pk=borsch_too.pk)
+        post.text = 'Лыжный поход по зимнему лесу с палаткой'
+        post.save()
+        run_pending()
+        self.assertNotIn(borsch_too, related_posts(borsch))
+        self.assertIn(post, related_posts(self.posts[2]))
+
+    def test_rebuild_moves_consumer_with_rows(self):
+        run_pending()
+        Post.objects.create(author=self.author, text='Ещё один рецепт борща')
+        with mock.patch.object(
+            RelatedPost.objects, 'bulk_create', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                rebuild()
+        run_pending()
+        self.assertEqual(
+            related_posts(Post.objects.latest('pk'))[0], self.posts[0]
+        )
+
+    def test_reindex_only_when_text_changes(self):
+        run_pending()
+        updates = Task.objects.filter(
+            name='posts.update_related', status=Task.PENDING
+        )
+        post = Post.objects.get(pk=self.posts[0].pk)
+        post.image = 'posts/borsch.png'
+        post.save()
+        self.assertFalse(updates.exists())
+        post.text = 'Рецепт щей с капустой'
+        post.save()
+        self.assertTrue(updates.exists())
+
+    def test_post_detail_shows_related(self):
+        call_command('build_related', stdout=StringIO())
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(
+                reverse('posts:post_detail', args=(self.posts[2].pk,))
+            )
+        self.assertEqual(len([
+            query for query in queries
+            if 'posts_relatedpost' in query['sql']
+        ]), 1)
+        self.assertEqual(
+            response.context['related_posts'][0], self.posts[3]
+        )
+        self.assertContains(response, 'Похожие записи')
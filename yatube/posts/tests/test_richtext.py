@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..richtext import RENDERER_VERSION, render
+
+User = get_user_model()
+
+
+class RichTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.leo = User.objects.create_user(username='leo')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rendered_and_sanitized_on_save(self):
+        post = Post.objects.create(
+            author=self.author,
+            text='<script>@leo</script> #Лес\nhttps://ya.ru/?a=1&b=2.'
+        )
+        self.assertEqual(post.html_version, RENDERER_VERSION)
+        self.assertEqual(
+            post.text_html,
+            '&lt;script&gt;<a href="/profile/leo/">@leo</a>&lt;/script&gt; '
+            '<a href="/tag/%D0%BB%D0%B5%D1%81/">#Лес</a><br>'
+            '<a href="https://ya.ru/?a=1&amp;b=2" rel="nofollow">'
+            'https://ya.ru/?a=1&amp;b=2</a>.'
+        )
+        self.assertEqual(render('@leo #123', post.mentions), '@leo #123')
+
+    def test_feeds_output_stored_html(self):
+        post = Post.objects.create(author=self.author, text='Привет @leo')
+        Comment.objects.create(post=post, author=self.leo, text='#ответ')
+        link = '<a href="/profile/leo/">@leo</a>'
+        self.assertContains(Client().get(reverse('posts:index')), link)
+        response = Client().get(reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, link)
+        self.assertContains(response, '>#ответ</a>')
+
+    def test_command_rerenders_stale_rows(self):
+        post = Post.objects.create(author=self.author, text='@leo')
+        Post.objects.filter(pk=post.pk).update(
+            text_html='', html_version=0, mentions=''
+        )
+        out = StringIO()
+        call_command('render_texts', stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.html_version, RENDERER_VERSION)
+        self.assertIn('/profile/leo/', post.text_html)
+        self.assertIn('leo', post.mentions)
+        call_command('render_texts', stdout=out)
+        self.assertIn(': 0', out.getvalue().splitlines()[-2])
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..forms import SPAM_MESSAGE
+from ..models import Comment, Post, TextSignature
+from ..spam import bands, distance, near_duplicates, to_signed
+from ..text import simhash
+
+User = get_user_model()
+
+SPAM = 'Купите лучшие часы со скидкой прямо сейчас на нашем сайте {}'
+
+
+@override_settings(SPAM_DUPLICATE_LIMIT=2)
+class SpamTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='spammer')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Обычный пост про зимний лес и лыжи'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_simhash_of_near_duplicates(self):
+        first = simhash(SPAM.format('!'))
+        second = simhash(SPAM.format('!!'))
+        other = simhash('Совсем другой текст про поход в горы летом')
+        self.assertLess(distance(first, second), distance(first, other))
+        signed = to_signed(first)
+        self.assertEqual(bands(signed), bands(first))
+
+    def test_signatures_follow_writes(self):
+        self.assertTrue(TextSignature.objects.filter(
+            kind=TextSignature.POST, object_id=self.post.pk
+        ).exists())
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        comment.delete()
+        self.assertFalse(TextSignature.objects.filter(
+            kind=TextSignature.COMMENT
+        ).exists())
+
+    def test_lookup_is_fast(self):
+        Post.objects.create(author=self.user, text=SPAM.format(''))
+        with self.assertNumQueries(1):
+            found = near_duplicates(SPAM.format(''))
+        self.assertEqual(len(found), 1)
+
+    def test_spam_wave_rejected(self):
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            self.client.post(url, {'text': SPAM.format('')})
+        response = self.client.post(url, {'text': SPAM.format('')})
+        self.assertFormError(response, 'form', 'text', SPAM_MESSAGE)
+        self.assertEqual(
+            Post.objects.filter(text__startswith='Купите').count(), 2
+        )
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': SPAM.format('')}
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertContains(response, SPAM_MESSAGE)
+
+    def test_short_replies_are_not_spam(self):
+        url = reverse('posts:add_comment', args=(self.post.pk,))
+        for text in ('Спасибо!', '+1', '!!!', '👍') * 3:
+            self.client.post(url, {'text': text})
+        self.assertEqual(Comment.objects.count(), 12)
+        self.assertFalse(TextSignature.objects.filter(
+            kind=TextSignature.COMMENT
+        ).exists())
+
+    def test_editing_does_not_match_itself(self):
+        response = self.client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': self.post.text + '!'}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_sweep_command(self):
+        for suffix in ('', '!', '!!'):
+            Post.objects.create(author=self.user, text=SPAM.format(suffix))
+        TextSignature.objects.all().delete()
+        out = StringIO()
+        call_command('sweep_duplicates', workers=1, stdout=out)
+        self.assertIn('Текстов: 4, групп похожих: 1', out.getvalue())
+        self.assertEqual(TextSignature.objects.count(), 4)
@@ -0,0 +1,121 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.taskqueue import run_pending
+
+from .. import richtext
+from ..models import Post
+
+User = get_user_model()
+
+LONG_TEXT = ' '.join(f'слово{number % 50}' for number in range(400))
+
+
+@override_settings(TEXT_COMPRESS_THRESHOLD=500, TEXT_EXCERPT_LENGTH=50)
+class CompressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def stored(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT text, body FROM posts_post WHERE id = %s', [pk]
+            )
+            return cursor.fetchone()
+
+    def test_long_text_compacted_in_background(self):
+        post = Post.objects.create(author=self.author, text=LONG_TEXT)
+        self.assertEqual(self.stored(post.pk)[0], LONG_TEXT)
+        run_pending()
+        text, body = self.stored(post.pk)
+        self.assertTrue(text.endswith('…'))
+        self.assertLessEqual(len(text), 51)
+        self.assertLess(len(body), len(LONG_TEXT) // 4)
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.text, LONG_TEXT)
+        self.assertIn(LONG_TEXT[-20:], post.text_html)
+        feed_post = Post.objects.defer('body', 'body_html').get(pk=post.pk)
+        self.assertEqual(feed_post.text, text)
+
+    def test_pages_and_edit(self):
+        post = Post.objects.create(author=self.author, text=LONG_TEXT)
+        Post.objects.create(author=self.author, text='Короткий')
+        run_pending()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, LONG_TEXT[-20:])
+        self.assertContains(response, 'Короткий')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, LONG_TEXT[-20:])
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': LONG_TEXT + ' конец'}
+        )
+        self.assertEqual(self.stored(post.pk)[1], None)
+        run_pending()
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, LONG_TEXT + ' конец'
+        )
+
+    def test_compaction_flag_set_on_save(self):
+        post = Post.objects.create(author=self.author, text=LONG_TEXT)
+        short = Post.objects.create(author=self.author, text='Короткий')
+        self.assertEqual(
+            list(Post.objects.filter(compact_pending=True)), [post]
+        )
+        run_pending()
+        self.assertFalse(Post.objects.filter(compact_pending=True).exists())
+        short.save()
+        self.assertFalse(Post.objects.filter(compact_pending=True).exists())
+
+    def test_edit_during_compaction_is_kept(self):
+        post = Post.objects.create(author=self.author, text=LONG_TEXT)
+        rows = next(richtext.batches(
+            Post.objects.filter(compact_pending=True), 10
+        ))
+        edited = Post.objects.get(pk=post.pk)
+        edited.text = LONG_TEXT + ' правка'
+        edited.save()
+        self.assertEqual(richtext.update_rows(Post, rows, [[]]), 0)
+        self.assertEqual(self.stored(post.pk)[0], LONG_TEXT + ' правка')
+        run_pending()
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, LONG_TEXT + ' правка'
+        )
+
+    def test_saving_feed_instance_keeps_full_text_data(self):
+        User.objects.create_user(username='leo')
+        post = Post.objects.create(
+            author=self.author, text=LONG_TEXT + ' @leo'
+        )
+        run_pending()
+        mentions = Post.objects.get(pk=post.pk).mentions
+        self.assertIn('leo', mentions)
+        Post.objects.defer('body', 'body_html').get(pk=post.pk).save()
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.mentions, mentions)
+        self.assertEqual(post.text, LONG_TEXT + ' @leo')
+        self.assertFalse(post.compact_pending)
+
+    def test_compact_and_bench_commands(self):
+        post = Post.objects.create(author=self.author, text=LONG_TEXT)
+        out = StringIO()
+        call_command('compact_texts', stdout=out)
+        self.assertIn('posts: 1', out.getvalue())
+        self.assertIsNotNone(self.stored(post.pk)[1])
+        call_command('bench_storage', rows=50, repeat=5, stdout=out)
+        self.assertIn('compressed: 50', out.getvalue())
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+from ..suggestions import FollowGraph, suggest, suggestions_for
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    def test_adjacency(self):
+        graph = FollowGraph([(1, 2), (1, 3), (2, 3), (4, 3)])
+        following = {
+            graph.ids[node]: sorted(
+                graph.ids[neighbour] for neighbour in graph.following[node]
+            )
+            for node in range(len(graph))
+        }
+        self.assertEqual(following, {1: [2, 3], 2: [3], 3: [], 4: [3]})
+        self.assertEqual(graph.followers.degree(graph.index[3]), 3)
+
+    def test_friends_of_friends_and_co_followed(self):
+        # 1 читает 2; 2 читает 3; 4, как и 1, читает 2 и ещё 5
+        graph = FollowGraph([(1, 2), (2, 3), (4, 2), (4, 5)])
+        best = suggest(graph, graph.index[1], limit=5, fanout=10)
+        found = [graph.ids[node] for node, _ in best]
+        self.assertEqual(found, [3, 5])
+
+
+class SuggestionsBuildTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ann, cls.bob, cls.cat, cls.dan = (
+            User.objects.create_user(username=name)
+            for name in ('ann', 'bob', 'cat', 'dan')
+        )
+        for user, author in (
+            (cls.ann, cls.bob), (cls.bob, cls.cat),
+            (cls.dan, cls.bob), (cls.dan, cls.cat),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_command_stores_ranked_suggestions(self):
+        out = StringIO()
+        call_command('build_suggestions', stdout=out)
+        self.assertIn('Пользователей в графе: 4', out.getvalue())
+        with self.assertNumQueries(1):
+            suggested = [
+                item.author for item in suggestions_for(self.ann)
+            ]
+        self.assertEqual(suggested[0], self.cat)
+        self.assertNotIn(self.bob, suggested)
+        self.assertEqual(
+            FollowSuggestion.objects.filter(user=self.ann).first().rank, 1
+        )
+
+    def test_newcomer_gets_popular_authors(self):
+        call_command('build_suggestions', stdout=StringIO())
+        newcomer = User.objects.create_user(username='eve')
+        suggested = [item.author for item in suggestions_for(newcomer)]
+        self.assertEqual(suggested[:2], [self.bob, self.cat])
+
+    def test_shown_on_profile(self):
+        call_command('build_suggestions', stdout=StringIO())
+        client = Client()
+        client.force_login(self.ann)
+        response = client.get(reverse('posts:profile', args=('dan',)))
+        self.assertContains(response, 'На кого подписаться')
+        self.assertContains(
+            response, reverse('posts:profile', args=('cat',))
+        )
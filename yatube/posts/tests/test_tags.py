@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, PostTag, Tag
+from ..text import hashtags
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_hashtags(self):
+        self.assertEqual(
+            hashtags('#Лыжи и #лыжи, #зима2022; a#b &#123; #42'),
+            ['лыжи', 'зима2022']
+        )
+
+    def test_form_saves_tags(self):
+        self.client.post(
+            reverse('posts:post_create'), {'text': 'Поход #Лес #зима'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(
+            sorted(post.post_tags.values_list('tag__name', flat=True)),
+            ['зима', 'лес']
+        )
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': 'Поход #лес'}
+        )
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['лес']
+        )
+        self.assertEqual(post.post_tags.get().pub_date, post.pub_date)
+
+    @override_settings(PER_PAGE=2)
+    def test_tag_feed_cursor(self):
+        for number in range(3):
+            self.client.post(
+                reverse('posts:post_create'), {'text': f'Пост {number} #лес'}
+            )
+        url = reverse('posts:tag_feed', args=('Лес',))
+        response = self.client.get(url)
+        self.assertEqual(
+            [post.text for post in response.context['posts']],
+            ['Пост 2 #лес', 'Пост 1 #лес']
+        )
+        response = self.client.get(
+            url, {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            [post.text for post in response.context['posts']],
+            ['Пост 0 #лес']
+        )
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:tag_feed', args=('нет',))
+            ).status_code,
+            404
+        )
+
+    def test_tag_feed_normalizes_name(self):
+        self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост #forest'}
+        )
+        response = self.client.get(
+            reverse('posts:tag_feed', args=('ＦＯＲＥＳＴ',))
+        )
+        self.assertEqual(
+            [post.text for post in response.context['posts']],
+            ['Пост #forest']
+        )
+        response = self.client.get(reverse('posts:tag_feed', args=('2024',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_reindex_command(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'#тег{number % 2} пост')
+            for number in range(5)
+        ])
+        out = StringIO()
+        call_command('reindex_tags', batch=2, stdout=out)
+        self.assertIn('Проиндексировано постов: 5', out.getvalue())
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(PostTag.objects.count(), 5)
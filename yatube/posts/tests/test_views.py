@@ -41,6 +41,7 @@ class PostsViewsTests(TestCase):
         cls.count_objects_on_last_page = len(post_objects) % settings.PER_PAGE
 
     def setUp(self):
+        cache.clear()
         self.authorized_client_author = Client()
         self.authorized_client_author.force_login(self.user_author)
         self.authorized_follower = Client()
@@ -0,0 +1,68 @@
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..warmup import RateLimiter, warm, warmup_urls
+
+User = get_user_model()
+
+
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Group.objects.create(title='Пустая', slug='empty', description='')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_urls_ordered_by_popularity(self):
+        urls = warmup_urls(pages=2, groups=1, profiles=1, posts=1)
+        self.assertEqual(urls, [
+            '/', '/?page=2',
+            '/group/group/', '/group/group/?page=2',
+            '/profile/author/', '/profile/author/?page=2',
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        ])
+
+    def test_warmed_page_served_without_queries(self):
+        url = reverse('posts:profile', args=('author',))
+        self.assertEqual(warm([url]), [(url, 200)])
+        with self.assertNumQueries(0):
+            response = Client().get(url)
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_requests_pass_through_middleware(self):
+        url = reverse('posts:profile', args=('author',)).rstrip('/')
+        self.assertEqual(warm([url]), [(url, 301)])
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = RateLimiter(rate=100)
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.02)
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'warm_cache', pages=1, groups=1, profiles=1, posts=1,
+            workers=1, rate=0, stdout=out
+        )
+        self.assertIn('Прогрето страниц: 4 из 4', out.getvalue())
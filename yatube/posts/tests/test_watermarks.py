@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import FeedWatermark, Follow, Post
+from ..watermarks import unread_count
+
+User = get_user_model()
+
+
+class FeedWatermarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def new_count(self):
+        return self.client.get(reverse('posts:follow_new')).json()['count']
+
+    def test_counter_follows_new_posts(self):
+        self.assertEqual(self.new_count(), 0)
+        Post.objects.create(author=self.author, text='Новый 1')
+        post = Post.objects.create(author=self.author, text='Новый 2')
+        Post.objects.create(author=self.reader, text='Чужой')
+        self.assertEqual(self.new_count(), 2)
+        post.delete()
+        self.assertEqual(self.new_count(), 1)
+
+    def test_endpoint_reads_counter_only(self):
+        FeedWatermark.objects.filter(user=self.reader).update(unread=3)
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_count(self.reader), 3)
+
+    def test_follow_recounts(self):
+        FeedWatermark.objects.filter(user=self.reader).update(
+            last_seen_post_id=0
+        )
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Пост другого автора')
+        Follow.objects.create(user=self.reader, author=other)
+        self.assertEqual(self.new_count(), 2)
+
+    def see(self, response):
+        self.client.post(
+            reverse('posts:follow_seen'),
+            {'post_id': response.context['seen_up_to']},
+        )
+
+    def test_delta_shows_only_new_posts(self):
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        response = self.client.get(reverse('posts:follow_index') + '?new')
+        self.assertEqual(list(response.context['page_obj']), [new_post])
+        self.assertEqual(self.new_count(), 1)
+        self.see(response)
+        self.assertEqual(self.new_count(), 0)
+        response = self.client.get(reverse('posts:follow_index') + '?new')
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_feed_get_writes_nothing(self):
+        Post.objects.create(author=self.author, text='Новый')
+        self.client.get(reverse('posts:follow_index'))
+        self.client.get(reverse('posts:follow_index') + '?new')
+        self.assertEqual(self.new_count(), 1)
+
+    def test_delta_pages_keep_watermark(self):
+        posts = [
+            Post.objects.create(author=self.author, text=f'Новый {i}')
+            for i in range(settings.PER_PAGE + 3)
+        ]
+        url = reverse('posts:follow_index')
+        response = self.client.get(url + '?new')
+        self.see(response)
+        self.assertEqual(self.new_count(), 0)
+        since = self.old_post.pk
+        self.assertContains(response, f'?new={since}&amp;page=2')
+        response = self.client.get(url, {'new': since, 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertLess(
+            max(post.pk for post in response.context['page_obj']),
+            posts[-1].pk,
+        )
+
+    def test_seen_older_page_keeps_newer_unread(self):
+        older = Post.objects.create(author=self.author, text='Первый')
+        Post.objects.create(author=self.author, text='Второй')
+        self.client.post(reverse('posts:follow_seen'), {'post_id': older.pk})
+        self.assertEqual(self.new_count(), 1)
+        self.client.post(
+            reverse('posts:follow_seen'), {'post_id': self.old_post.pk}
+        )
+        self.assertEqual(self.new_count(), 1)
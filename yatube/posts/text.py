@@ -0,0 +1,80 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+
+WORD_RE = re.compile(r'\w{2,}')
+HASHTAG_RE = re.compile(r'(?<![\w&])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@/])@(\w(?:[\w.+-]{0,148}\w)?)')
+
+
+def words(text):
+    """Слова текста в нижнем регистре, без цифр и однобуквенных."""
+    return [
+        word for word in WORD_RE.findall(text.lower())
+        if not word.isdigit()
+    ]
+
+
+def feature(token, bits):
+    """Номер признака слова: хеш, сведённый к bits битам."""
+    return zlib.crc32(token.encode()) & ((1 << bits) - 1)
+
+
+def shingles(text, size=3):
+    """Перекрывающиеся тройки слов; для коротких текстов — сами слова."""
+    tokens = words(text)
+    if len(tokens) < size:
+        return tokens
+    return [
+        ' '.join(tokens[start:start + size])
+        for start in range(len(tokens) - size + 1)
+    ]
+
+
+def simhash(text, bits=64):
+    """SimHash: у похожих текстов отпечатки отличаются в немногих битах."""
+    totals = [0] * bits
+    for shingle in shingles(text):
+        value = int.from_bytes(
+            hashlib.blake2b(shingle.encode(), digest_size=bits // 8).digest(),
+            'big'
+        )
+        for bit in range(bits):
+            totals[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+
+
+def tag_name(raw):
+    """Имя тега в нормальной форме; None для тегов из одних цифр."""
+    name = unicodedata.normalize('NFKC', raw).lower()
+    return None if name.isdigit() else name
+
+
+def hashtags(text):
+    """Теги текста в нижнем регистре, без повторов, в порядке появления."""
+    found = []
+    for raw in HASHTAG_RE.findall(text):
+        name = tag_name(raw)
+        if name is not None and name not in found:
+            found.append(name)
+    return found
+
+
+def mentions(text):
+    """Упоминания @username: (начало, конец, имя) для каждого вхождения."""
+    return [
+        (match.start(), match.end(), match.group(1))
+        for match in MENTION_RE.finditer(text)
+    ]
+
+
+def excerpt(text, length):
+    """Начало текста не длиннее length символов, обрезанное по пробелу."""
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip() + '…'
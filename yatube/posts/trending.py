@@ -0,0 +1,207 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.outbox import Consumer, head
+from core.versions import bump
+
+from .models import Comment, Follow, GroupScore, Post, PostScore
+
+TOPICS = [
+    'post.created', 'comment.created', 'follow.created', 'follow.deleted',
+]
+
+# Начало отсчёта времени для весов; может быть любым, но не меняться.
+EPOCH = datetime(2021, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def log_weight(when):
+    """Логарифм веса события в момент when.
+
+    Событие весит exp(λ·(when − EPOCH)), то есть каждые TRENDING_HALF_LIFE
+    секунд вдвое больше прежних. В любой момент это равносильно
+    затуханию старых событий, а накопленные суммы не нужно пересчитывать.
+    """
+    return decay_rate() * (when - EPOCH).total_seconds()
+
+
+def logaddexp(a, b):
+    """log(exp(a) + exp(b)) без переполнения."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def reach_bonus(followers):
+    return settings.TRENDING_REACH_WEIGHT * math.log1p(followers)
+
+
+def follower_counts(author_ids):
+    counts = dict(
+        Follow.objects.filter(author_id__in=author_ids).values(
+            'author_id'
+        ).annotate(count=Count('id')).values_list('author_id', 'count')
+    )
+    return {author_id: counts.get(author_id, 0) for author_id in author_ids}
+
+
+def collect(events, since):
+    """Сводит пачку событий к приростам: посты (вес и число новых
+    комментариев) и авторы, у которых изменилось число подписчиков."""
+    increments = defaultdict(lambda: [None, 0])
+    authors = set()
+    for event in events:
+        if event.topic.startswith('follow.'):
+            authors.add(event.data['author_id'])
+        elif event.topic == 'post.created':
+            increments[event.object_id]
+        elif event.created >= since:
+            item = increments[event.data['post_id']]
+            item[0] = logaddexp(item[0], log_weight(event.created))
+            item[1] += 1
+    return increments, authors
+
+
+def process(events):
+    """Обработчик пачки событий ленты core.outbox: обновляет веса
+    затронутых постов и их групп парой массовых запросов."""
+    since = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+    increments, authors = collect(events, since)
+    posts = {
+        pk: (author_id, group_id, pub_date)
+        for pk, author_id, group_id, pub_date in Post.objects.filter(
+            pk__in=list(increments), pub_date__gte=since
+        ).values_list('pk', 'author_id', 'group_id', 'pub_date')
+    }
+    scores = PostScore.objects.in_bulk(list(posts))
+    touched = list(scores.values()) + list(PostScore.objects.filter(
+        post__author_id__in=authors, post__pub_date__gte=since
+    ).exclude(pk__in=list(scores)).select_related('post'))
+    reach = follower_counts(
+        {author_id for author_id, _, _ in posts.values()}
+        | {score.post.author_id for score in touched if score.pk not in posts}
+    )
+    group_heat = defaultdict(lambda: None)
+    created = []
+    for pk, (author_id, group_id, pub_date) in posts.items():
+        heat, comments = increments[pk]
+        score = scores.get(pk)
+        if score is None:
+            score = PostScore(post_id=pk, heat=log_weight(pub_date))
+            created.append(score)
+            if group_id:
+                group_heat[group_id] = logaddexp(
+                    group_heat[group_id], log_weight(pub_date)
+                )
+        if heat is not None:
+            score.heat = logaddexp(score.heat, heat)
+            score.comments += comments
+            if group_id:
+                group_heat[group_id] = logaddexp(group_heat[group_id], heat)
+        score.score = score.heat + reach_bonus(reach[author_id])
+    for score in touched:
+        if score.pk not in posts:
+            score.score = score.heat + reach_bonus(
+                reach[score.post.author_id]
+            )
+    PostScore.objects.bulk_create(created)
+    PostScore.objects.bulk_update(touched, ['heat', 'score', 'comments'])
+    update_groups(group_heat)
+    bump(PostScore)
+
+
+def update_groups(group_heat):
+    groups = GroupScore.objects.in_bulk(list(group_heat))
+    for group_id, heat in group_heat.items():
+        if group_id in groups:
+            groups[group_id].score = logaddexp(groups[group_id].score, heat)
+        else:
+            groups[group_id] = GroupScore(group_id=group_id, score=heat)
+    new = [score for score in groups.values() if score._state.adding]
+    existing = [score for score in groups.values() if score not in new]
+    GroupScore.objects.bulk_create(new)
+    GroupScore.objects.bulk_update(existing, ['score'])
+
+
+def prune():
+    """Убирает из ленты посты старше TRENDING_WINDOW."""
+    since = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+    deleted, _ = PostScore.objects.filter(post__pub_date__lt=since).delete()
+    if deleted:
+        bump(PostScore)
+    return deleted
+
+
+def consumer():
+    return Consumer(
+        'trending', topics=TOPICS, batch_size=settings.TRENDING_BATCH_SIZE
+    )
+
+
+def update():
+    """Учитывает новые события и чистит устаревшие посты."""
+    processed = consumer().run(process)
+    prune()
+    return processed
+
+
+def rebuild():
+    """Пересчитывает ленту заново по постам, комментариям и подпискам:
+    события core.outbox к этому времени могли уже удалить (prune).
+    Возвращает число постов в ленте."""
+    position = head()
+    since = timezone.now() - timedelta(seconds=settings.TRENDING_WINDOW)
+    posts = {
+        pk: (author_id, group_id, log_weight(pub_date))
+        for pk, author_id, group_id, pub_date in Post.objects.filter(
+            pub_date__gte=since
+        ).values_list('pk', 'author_id', 'group_id', 'pub_date')
+    }
+    comments = defaultdict(int)
+    for post_id, created in Comment.objects.filter(
+        post_id__in=list(posts), created__gte=since
+    ).values_list('post_id', 'created'):
+        author_id, group_id, heat = posts[post_id]
+        posts[post_id] = (
+            author_id, group_id, logaddexp(heat, log_weight(created))
+        )
+        comments[post_id] += 1
+    reach = follower_counts(
+        {author_id for author_id, _, _ in posts.values()}
+    )
+    scores = []
+    group_heat = defaultdict(lambda: None)
+    for pk, (author_id, group_id, heat) in posts.items():
+        scores.append(PostScore(
+            post_id=pk, heat=heat, comments=comments[pk],
+            score=heat + reach_bonus(reach[author_id])
+        ))
+        if group_id:
+            group_heat[group_id] = logaddexp(group_heat[group_id], heat)
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        GroupScore.objects.all().delete()
+        PostScore.objects.bulk_create(scores)
+        GroupScore.objects.bulk_create([
+            GroupScore(group_id=group_id, score=score)
+            for group_id, score in group_heat.items()
+        ])
+        consumer().seek(position)
+    bump(PostScore)
+    return len(scores)
+
+
+def trending_groups(limit=None):
+    return list(GroupScore.objects.select_related('group').order_by(
+        '-score'
+    )[:limit or settings.TRENDING_GROUPS])
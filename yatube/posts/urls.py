@@ -6,6 +6,13 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('trending/', views.trending, name='trending'),
+    path('tag/<str:name>/', views.tag_feed, name='tag_feed'),
+    path(
+        'groups/autocomplete/',
+        views.group_autocomplete,
+        name='group_autocomplete'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
@@ -14,6 +21,13 @@ urlpatterns = [
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/new/', views.follow_new, name='follow_new'),
+    path('follow/seen/', views.follow_seen, name='follow_seen'),
+    path('notifications/', views.notifications, name='notifications'),
+    path(
+        'notifications/seen/', views.notifications_seen,
+        name='notifications_seen'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,10 +1,24 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
+from core.holes import cache_page_with_holes
+from core.pagination import cursor_page
+from core.sqlite import retry_on_locked
+
+from .cards import get_card_page
+from .catalogue import get_group_or_404, search
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import (Comment, Follow, Group, Post, PostScore, PostTag, Tag,
+                     User)
+from .notifications import inbox, mark_read
+from .related import related_posts
+from .text import tag_name
+from .trending import trending_groups
+from .watermarks import last_seen, mark_seen, unread_count
 
 
 def pagination(request, post_list):
@@ -14,35 +28,90 @@ def pagination(request, post_list):
     return(page_obj)
 
 
+def feed(post_list):
+    """Посты ленты с отрывками текста, без сжатых полных тел."""
+    return post_list.defer('body', 'body_html')
+
+
+@cache_page_with_holes(Post, Group, Comment, User)
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
+    post_list = feed(Post.objects.all())
     page_obj = pagination(request, post_list)
     context = {
         'page_obj': page_obj,
+        'live_topics': ['index'],
     }
     return render(request, template, context)
 
 
+@cache_page_with_holes(Post, Group, Comment, User)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.groups.all()
+    group = get_group_or_404(slug)
+    post_list = feed(group.groups.all())
     page_obj = pagination(request, post_list)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'live_topics': [f'group:{group.pk}'],
+    }
+    return render(request, template, context)
+
+
+def trending(request):
+    template = 'posts/trending.html'
+    post_list = Post.objects.filter(trending__isnull=False).order_by(
+        '-trending__score', '-pk'
+    )
+    context = {
+        'page_obj': get_card_page(
+            request, post_list, 'trending', models=(PostScore,)
+        ),
+        'groups': trending_groups(),
+    }
+    return render(request, template, context)
+
+
+def tag_feed(request, name):
+    template = 'posts/tag.html'
+    name = tag_name(name)
+    if name is None:
+        raise Http404
+    tag = get_object_or_404(Tag, name=name)
+    post_tags = PostTag.objects.filter(tag=tag).select_related(
+        'post__author', 'post__group'
+    ).defer('post__body', 'post__body_html')
+    page, next_cursor = cursor_page(
+        post_tags, request.GET.get('cursor'), settings.PER_PAGE,
+        'pub_date', 'post_id'
+    )
+    context = {
+        'tag': tag,
+        'posts': [post_tag.post for post_tag in page],
+        'next_cursor': next_cursor,
     }
     return render(request, template, context)
 
 
+def group_autocomplete(request):
+    groups = search(
+        request.GET.get('q', ''), settings.GROUP_AUTOCOMPLETE_LIMIT
+    )
+    return JsonResponse({'results': [
+        {'id': group.pk, 'title': group.title, 'slug': group.slug}
+        for group in groups
+    ]})
+
+
+@cache_page_with_holes(Post, Group, Comment, User)
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    post_list = feed(author.posts.all())
     count_post = post_list.count()
     page_obj = pagination(request, post_list)
-    if request.user.is_authenticated and Follow.objects.filter(
+    if request.user.is_authenticated and Follow.cached.filter(
             user=request.user, author=author).exists():
         following = True
     else:
@@ -56,11 +125,13 @@ def profile(request, username):
     return render(request, template, context)
 
 
-def post_detail(request, post_id):
+def post_detail(request, post_id, comment_form=None):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    count_post = post.author.posts.count()
-    comment_form = CommentForm(
+    post = get_object_or_404(
+        Post.cached.select_related('author', 'group'), pk=post_id
+    )
+    count_post = Post.cached.filter(author_id=post.author_id).count()
+    comment_form = comment_form or CommentForm(
         request.POST or None,
     )
     comments = post.comments.all()
@@ -68,19 +139,27 @@ def post_detail(request, post_id):
         'post': post,
         'count_post': count_post,
         'form': comment_form,
-        'comments': comments
+        'comments': comments,
+        'related_posts': related_posts(post),
     }
     return render(request, template, context)
 
 
+@retry_on_locked
+def create_post(form, author):
+    post = form.save(commit=False)
+    post.author = author
+    post.save()
+    form.save_m2m()
+    return post
+
+
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+        post = create_post(form, request.user)
         return redirect('posts:profile', username=post.author.username)
     return render(request, template, {'form': form})
 
@@ -97,7 +176,7 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        post = form.save()
+        post = retry_on_locked(form.save)()
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -107,15 +186,24 @@ def post_edit(request, post_id):
     return render(request, template, context)
 
 
+@retry_on_locked
+def create_comment(form, post, author):
+    comment = form.save(commit=False)
+    comment.author = author
+    comment.post = post
+    comment.save()
+    return comment
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        create_comment(form, post, request.user)
+    elif form.is_bound:
+        # Отклонённый комментарий показываем с ошибкой, а не теряем.
+        return post_detail(request, post_id, comment_form=form)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -125,20 +213,77 @@ def follow_index(request):
     bloggers_id = Follow.objects.filter(user=request.user).values_list(
         'author_id', flat=True
     )
-    post_list = Post.objects.filter(author_id__in=bloggers_id)
+    post_list = feed(Post.objects.filter(author_id__in=bloggers_id))
+    new_only = 'new' in request.GET
+    since = None
+    if new_only:
+        # Отметка фиксируется при первом заходе и едет в ссылках страниц,
+        # иначе после первой страницы остальные новые посты пропадут.
+        since = request.GET['new']
+        if not since.isdigit():
+            since = last_seen(request.user)
+        post_list = post_list.filter(pk__gt=since)
     page_obj = pagination(request, post_list)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'new_only': new_only,
+        'page_query': f'new={since}&' if new_only else '',
+        'seen_up_to': max((post.pk for post in page_obj), default=0),
+        'live_topics': [f'author:{pk}' for pk in bloggers_id],
+    }
+    return render(request, template, context)
+
+
+@login_required
+def notifications(request):
+    template = 'posts/notifications.html'
+    page, next_cursor = inbox(request.user, request.GET.get('cursor'))
+    context = {
+        'notifications': page,
+        'next_cursor': next_cursor,
+        'unread': [item.pk for item in page if not item.is_read],
     }
     return render(request, template, context)
 
 
+@login_required
+@require_POST
+def notifications_seen(request):
+    """Отмечает прочитанными показанные уведомления, как follow_seen."""
+    notification_ids = [
+        int(pk) for pk in request.POST.getlist('notification_id')
+        if pk.isdigit()
+    ]
+    read = 0
+    if notification_ids:
+        read = retry_on_locked(mark_read)(request.user, notification_ids)
+    return JsonResponse({'read': read})
+
+
+@login_required
+def follow_new(request):
+    return JsonResponse({'count': unread_count(request.user)})
+
+
+@login_required
+@require_POST
+def follow_seen(request):
+    """Отмечает прочитанным показанное в ленте: запись идёт отдельным
+    POST со страницы, а сама лента на GET только читает."""
+    post_id = request.POST.get('post_id', '')
+    if post_id.isdigit():
+        retry_on_locked(mark_seen)(request.user, int(post_id))
+    return JsonResponse({'count': unread_count(request.user)})
+
+
 @login_required
 def profile_follow(request, username):
     follower = request.user
     following = get_object_or_404(User, username=username)
     if follower != following:
-        Follow.objects.get_or_create(user=follower, author=following)
+        retry_on_locked(Follow.objects.get_or_create)(
+            user=follower, author=following
+        )
     return redirect('posts:profile', username=username)
 
 
@@ -146,5 +291,7 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     follower = request.user
     following = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=follower, author=following).delete()
+    retry_on_locked(
+        Follow.objects.filter(user=follower, author=following).delete
+    )()
     return redirect('posts:profile', username=username)
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.db.models import Count
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Не больше rate запросов в секунду на все потоки прогрева."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_start = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def paged(url, pages):
+    return [url] + [f'{url}?page={number}' for number in range(2, pages + 1)]
+
+
+def warmup_urls(pages, groups, profiles, posts):
+    """Самые посещаемые страницы: первые страницы главной ленты,
+    самых больших групп и самых популярных авторов, а также
+    самые обсуждаемые посты (счётчика просмотров у постов нет)."""
+    urls = paged(reverse('posts:index'), pages)
+    top_groups = Group.objects.annotate(
+        posts_count=Count('groups')
+    ).order_by('-posts_count').values_list('slug', flat=True)[:groups]
+    for slug in top_groups:
+        urls += paged(reverse('posts:group_list', args=(slug,)), pages)
+    top_authors = User.objects.annotate(
+        followers=Count('following')
+    ).order_by('-followers').values_list('username', flat=True)[:profiles]
+    for username in top_authors:
+        urls += paged(reverse('posts:profile', args=(username,)), pages)
+    top_posts = Post.objects.annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count').values_list('pk', flat=True)[:posts]
+    urls += [reverse('posts:post_detail', args=(pk,)) for pk in top_posts]
+    return urls
+
+
+def warmup_request(url):
+    """Анонимный GET-запрос, собранный так же, как его собирает
+    WSGI-сервер."""
+    path, _, query = url.partition('?')
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': settings.CACHE_WARMUP['host'],
+        'SERVER_PORT': '80',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': BytesIO(),
+        'wsgi.url_scheme': 'http',
+    })
+
+
+def render_url(handler, url):
+    """Отрисовывает страницу через всю цепочку middleware, как при
+    обычном визите: с сессиями, журналом медленных запросов
+    и ограничением нагрузки."""
+    return handler.get_response(warmup_request(url)).status_code
+
+
+def warm(urls, workers=1, rate=0):
+    """Прогревает кеш страницами urls в workers потоков,
+    не чаще rate запросов в секунду (0 — без ограничения)."""
+    limiter = RateLimiter(rate)
+    handler = BaseHandler()
+    handler.load_middleware()
+
+    def task(url):
+        limiter.wait()
+        try:
+            return url, render_url(handler, url)
+        except Exception:
+            logger.exception('Не удалось прогреть %s', url)
+            return url, None
+        finally:
+            if workers > 1:
+                connections.close_all()
+
+    if workers <= 1:
+        return [task(url) for url in urls]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(task, urls))
+
+
+def warm_from_settings():
+    options = settings.CACHE_WARMUP
+    urls = warmup_urls(
+        options['pages'], options['groups'],
+        options['profiles'], options['posts'],
+    )
+    return warm(urls, options['workers'], options['rate'])
+
+
+def schedule_warmup():
+    """Прогрев после старта процесса, если он включён в настройках.
+
+    Из всех процессов, стартовавших одновременно, прогрев выполняет один.
+    """
+    if not settings.CACHE_WARMUP_ON_STARTUP:
+        return
+
+    def run():
+        time.sleep(settings.CACHE_WARMUP_DELAY)
+        if cache.add('warmup:lock', 1, settings.CACHE_WARMUP_LOCK_TIMEOUT):
+            warm_from_settings()
+        connections.close_all()
+
+    threading.Thread(target=run, name='cache-warmup', daemon=True).start()
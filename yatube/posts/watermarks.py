@@ -0,0 +1,81 @@
+from django.db.models import F, Max
+
+from .models import FeedWatermark, Follow, Post
+
+
+def followers(author_id):
+    return Follow.objects.filter(author_id=author_id).values('user_id')
+
+
+def post_created(sender, instance, created, **kwargs):
+    """Новый пост увеличивает счётчики всех подписчиков автора
+    одним UPDATE, ленты при этом не пересчитываются."""
+    if not created:
+        return
+    FeedWatermark.objects.filter(
+        user_id__in=followers(instance.author_id),
+        last_seen_post_id__lt=instance.pk,
+    ).update(unread=F('unread') + 1)
+
+
+def post_deleted(sender, instance, **kwargs):
+    FeedWatermark.objects.filter(
+        user_id__in=followers(instance.author_id),
+        last_seen_post_id__lt=instance.pk,
+        unread__gt=0,
+    ).update(unread=F('unread') - 1)
+
+
+def count_unread(user_id, last_seen):
+    return Post.objects.filter(
+        author__following__user_id=user_id,
+        pk__gt=last_seen,
+    ).count()
+
+
+def follow_changed(sender, instance, **kwargs):
+    """Подписки меняются редко, поэтому счётчик пересчитывается заново.
+
+    Первая подписка заводит отметку на последнем посте: до неё в ленте
+    нечего было читать, а ленте на GET не нужно ничего записывать.
+    """
+    watermark = FeedWatermark.objects.filter(user_id=instance.user_id)
+    last_seen = watermark.values_list('last_seen_post_id', flat=True).first()
+    if last_seen is None:
+        latest = Post.objects.aggregate(latest=Max('pk'))['latest'] or 0
+        FeedWatermark.objects.get_or_create(
+            user_id=instance.user_id,
+            defaults={'last_seen_post_id': latest},
+        )
+        return
+    watermark.update(unread=count_unread(instance.user_id, last_seen))
+
+
+def unread_count(user):
+    """Число новых постов в ленте подписок — один запрос по ключу."""
+    return FeedWatermark.objects.filter(user=user).values_list(
+        'unread', flat=True
+    ).first() or 0
+
+
+def last_seen(user):
+    return FeedWatermark.objects.filter(user=user).values_list(
+        'last_seen_post_id', flat=True
+    ).first() or 0
+
+
+def mark_seen(user, post_id):
+    """Отмечает прочитанными посты до показанного post_id включительно.
+
+    Отметка только растёт: более старая страница её не откатывает, а
+    посты новее показанных остаются в счётчике.
+    """
+    unread = count_unread(user.pk, post_id)
+    updated = FeedWatermark.objects.filter(
+        user=user, last_seen_post_id__lt=post_id
+    ).update(last_seen_post_id=post_id, unread=unread)
+    if not updated:
+        FeedWatermark.objects.get_or_create(
+            user=user,
+            defaults={'last_seen_post_id': post_id, 'unread': unread},
+        )
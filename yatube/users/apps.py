@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model, user_logged_out
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        from .signals import invalidate_logged_out_user, invalidate_user
+        User = get_user_model()
+        post_save.connect(invalidate_user, sender=User)
+        post_delete.connect(invalidate_user, sender=User)
+        user_logged_out.connect(invalidate_logged_out_user)
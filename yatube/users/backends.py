@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кеша.
+
+    Запись сбрасывается при любом сохранении или удалении пользователя
+    и при выходе из аккаунта (см. users.signals).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            user_cache().set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,10 @@
+from .backends import user_cache, user_cache_key
+
+
+def invalidate_user(sender, instance, **kwargs):
+    user_cache().delete(user_cache_key(instance.pk))
+
+
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        user_cache().delete(user_cache_key(user.pk))
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .backends import user_cache, user_cache_key
+
+User = get_user_model()
+
+
+class CachedSessionUserTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test_user', password='old-password-123'
+        )
+
+    def setUp(self):
+        user_cache().clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_repeated_requests_do_not_hit_database(self):
+        self.authorized_client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(self.url)
+        self.assertEqual(response.context['user'].pk, self.user.pk)
+
+    def test_password_change_invalidates_cached_user(self):
+        self.authorized_client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password-456')
+        user.save()
+        self.assertIsNone(user_cache().get(user_cache_key(self.user.pk)))
+        response = self.authorized_client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_drops_cached_session_and_user(self):
+        self.authorized_client.get(self.url)
+        self.authorized_client.get(reverse('users:logout'))
+        self.assertIsNone(user_cache().get(user_cache_key(self.user.pk)))
+        response = self.authorized_client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_session_survives_cache_loss(self):
+        self.authorized_client.get(self.url)
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(response.context['user'].pk, self.user.pk)
+
+    def test_session_with_old_backend_still_works(self):
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(self.url)
+        self.assertEqual(response.context['user'].pk, self.user.pk)
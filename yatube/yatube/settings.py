@@ -25,6 +25,9 @@ SECRET_KEY = '7as!3401$=9t8e*r+_(nf75t13(h+aek!m1j1j=f7)v3ex7p7l'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -50,20 +53,51 @@ INSTALLED_APPS = [
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Общий для всех процессов кеш в файлах и двухуровневый кеш поверх него
+# с ограниченным LRU в памяти каждого процесса.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'STALE_GRACE': 60,
+            'LOCK_TIMEOUT': 10,
+            'EARLY_REFRESH_BETA': 1.0,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Только версии таблиц (core.versions): записей по одной на таблицу,
+    # до MAX_ENTRIES их не дорастает, и вытеснение их не затрагивает.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'versions'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
 }
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
+    'core.middleware.ReadYourWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.LoadSheddingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -80,6 +114,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.sse.sse',
             ],
         },
     },
@@ -97,13 +132,193 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# Реплики только для чтения. Для локальной проверки достаточно скопировать
+# db.sqlite3 в db_replica.sqlite3 и добавить в DATABASES:
+# 'replica': {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# а затем указать DATABASE_REPLICAS = ['replica'].
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Сколько секунд после записи клиент читает только с основной базы.
+REPLICA_PIN_SECONDS = 15
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Профили PRAGMA, применяемые к каждому новому соединению SQLite.
+SQLITE_PROFILE = 'production'
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+    },
+}
+# Повторы записи при `database is locked`: число попыток и базовая пауза, с.
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BACKOFF = 0.05
+
+# Страницы лент кешируются целиком на 20 секунд, персональные фрагменты
+# отрисовываются на каждый запрос (см. core.holes).
+PAGE_CACHE_TIMEOUT = 20
+TABLE_VERSIONS_CACHE_ALIAS = 'versions'
+# Кеш результатов запросов через менеджеры `cached` (см. core.querycache).
+QUERY_CACHE_ALIAS = 'default'
+QUERY_CACHE_TIMEOUT = 60 * 5
+# Каталог групп в памяти процесса сверяется с общим кешем раз в секунду;
+# при большем числе групп вместо <select> в PostForm — автодополнение.
+GROUP_CATALOGUE_CHECK_INTERVAL = 1
+GROUP_SELECT_LIMIT = 100
+GROUP_AUTOCOMPLETE_LIMIT = 10
+# Страницы лент из компактных карточек постов (см. posts.cards).
+CARDS_CACHE_TIMEOUT = 60 * 5
+# Прогрев кеша популярными страницами (manage.py warm_cache).
+# При CACHE_WARMUP_ON_STARTUP прогрев запускается и после старта WSGI.
+CACHE_WARMUP = {
+    'pages': 3,
+    'groups': 5,
+    'profiles': 5,
+    'posts': 20,
+    'workers': 4,
+    'rate': 10,
+    # Имя хоста в запросах прогрева; должно быть в ALLOWED_HOSTS
+    'host': 'localhost',
+}
+CACHE_WARMUP_ON_STARTUP = False
+CACHE_WARMUP_DELAY = 5
+CACHE_WARMUP_LOCK_TIMEOUT = 60
+# Как часто шапка сайта спрашивает число новых постов в подписках, секунды
+FOLLOW_POLL_INTERVAL = 60
+
+# Журнал изменений и сервер Server-Sent Events (manage.py runsse).
+# Прокси направляет SSE_URL на SSE_HOST:SSE_PORT.
+CHANGELOG_FILE = os.path.join(BASE_DIR, 'changes.log')
+# Дочитанный журнал больше этого размера ротируется в changes.log.1
+CHANGELOG_MAX_SIZE = 10 * 1024 * 1024
+SSE_URL = '/events/'
+SSE_HOST = '127.0.0.1'
+SSE_PORT = 8001
+SSE_HEARTBEAT = 15
+SSE_POLL_INTERVAL = 0.5
+SSE_QUEUE_SIZE = 100
+
+# Очередь фоновых задач в базе (manage.py runworkers)
+TASK_WORKER_PROCESSES = 2
+TASK_WORKER_THREADS = 4
+TASK_POLL_INTERVAL = 1
+TASK_MAX_ATTEMPTS = 5
+# Первая пауза перед повтором, секунды; дальше удваивается
+TASK_RETRY_BACKOFF = 2
+# Задача, выполняющаяся дольше, считается брошенной упавшим воркером
+TASK_TIMEOUT = 60 * 5
+# За какой период /metrics/ показывает выполненные задачи и их задержку
+TASK_METRICS_WINDOW = 60 * 5
+# Сколько хранить выполненные и упавшие задачи; не меньше окна метрик
+TASK_KEEP_FINISHED = 60 * 60 * 24 * 7
+
+# Сессия и пользователь читаются из общего кеша, в БД пишутся
+# только изменения. Движок именно cached_db, а не cache: при смене
+# или очистке кеша (например, при деплое с новым LOCATION) сессии
+# читаются из БД и пользователи не разлогиниваются.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+# ModelBackend остаётся в списке: в сессиях, созданных до перехода
+# на CachedModelBackend, записан его путь.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'shared'
+USER_CACHE_TIMEOUT = 60 * 5
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в очередь в базе и уходят пачками
+# из фоновой задачи через EMAIL_TRANSPORT_BACKEND.
+EMAIL_BACKEND = 'core.mail.OutboxEmailBackend'
+EMAIL_TRANSPORT_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 5
 PER_PAGE = 10
+NOTIFICATIONS_PER_PAGE = 20
+# Сколько уведомлений вставлять одним запросом при раздаче подписчикам
+NOTIFICATION_BATCH_SIZE = 500
+# Рекомендации подписок (manage.py build_suggestions)
+SUGGESTIONS_PER_USER = 5
+SUGGESTION_MAX_FANOUT = 50
+# Лента «Популярное»: вес активности вдвое падает за TRENDING_HALF_LIFE,
+# посты старше TRENDING_WINDOW из неё убираются (секунды)
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_WINDOW = 60 * 60 * 24 * 7
+TRENDING_REACH_WEIGHT = 0.5
+TRENDING_BATCH_SIZE = 1000
+TRENDING_GROUPS = 5
+# Похожие посты: хешированные признаки слов и TF-IDF (manage.py build_related)
+RELATED_POSTS = 5
+RELATED_FEATURE_BITS = 20
+# Слова, которые есть больше чем в этой доле постов, не учитываются
+RELATED_MAX_DF_RATIO = 0.2
+RELATED_BATCH_SIZE = 200
+# Защита от спама: текст отклоняется, если за SPAM_WINDOW секунд уже было
+# SPAM_DUPLICATE_LIMIT текстов с SimHash не дальше SPAM_MAX_DISTANCE бит
+SPAM_MAX_DISTANCE = 3
+SPAM_DUPLICATE_LIMIT = 3
+SPAM_WINDOW = 60 * 60 * 24
+# Тексты короче стольких троек слов на спам не проверяются
+SPAM_MIN_SHINGLES = 3
+# Пересчёт готового HTML постов и комментариев (manage.py render_texts)
+RENDER_BATCH_SIZE = 500
+# Тексты постов и комментариев длиннее TEXT_COMPRESS_THRESHOLD символов
+# хранятся сжатыми; в колонке text остаётся отрывок для лент.
+TEXT_COMPRESS_THRESHOLD = 2000
+TEXT_COMPRESS_LEVEL = 6
+TEXT_EXCERPT_LENGTH = 300
+TEXT_COMPACT_BATCH_SIZE = 200
+# Журнал медленных запросов; None отключает запись.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_FILE = os.path.join(BASE_DIR, 'slow_queries.log')
+
+# Защита от перегрузки: лимиты одновременных запросов и очередей
+# для классов представлений (см. core.overload).
+OVERLOAD_PROTECTION = {
+    'feeds': {
+        'views': [
+            'posts:index',
+            'posts:group_list',
+            'posts:profile',
+            'posts:post_detail',
+            'posts:follow_index',
+        ],
+        'max_concurrency': 8,
+        'max_queue': 16,
+        'queue_timeout': 2.0,
+        'slow_threshold': 1.0,
+    },
+    'writes': {
+        'views': [
+            'posts:post_create',
+            'posts:post_edit',
+            'posts:add_comment',
+            'posts:profile_follow',
+            'posts:profile_unfollow',
+        ],
+        'max_concurrency': 4,
+        'max_queue': 8,
+        'queue_timeout': 0.5,
+        'slow_threshold': 2.0,
+    },
+}
+OVERLOAD_RETRY_AFTER = 5
+# Последняя удачная отрисовка страницы хранится час
+# и обновляется не чаще раза в 30 секунд.
+OVERLOAD_STALE_TIMEOUT = 60 * 60
+OVERLOAD_STALE_REFRESH = 30
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators